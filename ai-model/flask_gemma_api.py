@@ -4,6 +4,7 @@ Gemma 3 270M-IT Flask API for Grant Writing AI
 Containerized deployment for Azure Container Instances
 """
 import logging
+import threading
 import time
 import os
 import torch
@@ -25,6 +26,8 @@ app = Flask(__name__)
 # Global variables for model and tokenizer
 model = None
 tokenizer = None
+# CUDA availability cannot change while the container runs; probe it once rather than per /health call
+_CUDA_AVAILABLE = torch.cuda.is_available()
 
 def load_model():
     """Load Gemma 3 270M-IT model and tokenizer"""
@@ -40,7 +43,7 @@ def load_model():
         tokenizer_start = time.time()
         tokenizer = AutoTokenizer.from_pretrained(
             model_name,
-            trust_remote_code=True,
+            use_fast=True,  # Rust tokenizers backend, never the slow Python fallback
             cache_dir='/app/cache'
         )
         tokenizer_time = time.time() - tokenizer_start
@@ -51,7 +54,6 @@ def load_model():
         model = AutoModelForCausalLM.from_pretrained(
             model_name,
             torch_dtype=torch.float32,  # CPU optimized
-            trust_remote_code=True,
             low_cpu_mem_usage=True,
             cache_dir='/app/cache'
         )
@@ -60,7 +62,7 @@ def load_model():
         
         # Test model functionality
         test_input = tokenizer('Hello', return_tensors='pt')
-        with torch.no_grad():
+        with torch.inference_mode():
             test_output = model.generate(**test_input, max_new_tokens=5, do_sample=False)
         test_text = tokenizer.decode(test_output[0], skip_special_tokens=True)
         logging.info(f'✅ Model test successful: "Hello" -> "{test_text}"')
@@ -72,6 +74,29 @@ def load_model():
         logging.error(f'❌ Model loading failed: {str(e)}')
         raise
 
+# Guards lazy loading when the app is served without running load_model() first (e.g. by gunicorn)
+_MODEL_LOCK = threading.Lock()
+
+def get_model():
+    """
+    Return the loaded (model, tokenizer), loading them once per process on first use.
+    Returns (None, None) while another request is still loading them.
+    """
+    if model is None:
+        if not _MODEL_LOCK.acquire(blocking=False):
+            return None, None
+        try:
+            if model is None:
+                load_model()
+        finally:
+            _MODEL_LOCK.release()
+    return model, tokenizer
+
+# When imported by a WSGI server the __main__ block below never runs, so page the weights in on a
+# background thread at worker start instead of making the first request pay the load time
+if __name__ != '__main__' and os.environ.get('MODEL_EAGER_LOAD', '1') == '1':
+    threading.Thread(target=get_model, name='model-warmup', daemon=True).start()
+
 @app.route('/', methods=['GET'])
 def root():
     """API documentation and status"""
@@ -114,15 +139,14 @@ def health():
         'timestamp': time.time(),
         'memory_info': {
             'available': 'Container optimized',
-            'torch_cuda_available': torch.cuda.is_available()
+            'torch_cuda_available': _CUDA_AVAILABLE
         }
     })
 
 @app.route('/generate', methods=['POST'])
 def generate():
     """Generate grant writing text using Gemma 3 270M-IT"""
-    global model, tokenizer
-    
+    model, tokenizer = get_model()
     if model is None or tokenizer is None:
         return jsonify({
             'error': 'Model not loaded - container may be starting up',
@@ -160,9 +184,9 @@ def generate():
         # Generate response
         start_time = time.time()
         
-        inputs = tokenizer(prompt, return_tensors='pt')
+        inputs = tokenizer(prompt, return_tensors='pt', truncation=True, max_length=2048)
         
-        with torch.no_grad():
+        with torch.inference_mode():
             outputs = model.generate(
                 **inputs,
                 max_new_tokens=max_new_tokens,
@@ -3,12 +3,15 @@
 GPT-OSS-20B Flask API for Grant Writing AI
 Containerized deployment for Azure Container Instances with GPU support
 """
+import contextlib
 import logging
+import queue
+import threading
 import time
 import os
 import torch
-from flask import Flask, request, jsonify
-from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+from flask import Flask, Response, request, jsonify, stream_with_context
+from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig, TextIteratorStreamer
 import psutil
 import pynvml
 
@@ -28,6 +31,18 @@ app = Flask(__name__)
 model = None
 tokenizer = None
 device = None
+# KV cache used by generate() - "static" only alongside a compiled forward (fixed decode shapes);
+# None keeps transformers' default dynamic cache, which is per-call and safe for concurrent requests
+cache_implementation = None
+# The static cache is a single buffer on the model reused by every generate() call, so calls are
+# serialized while it is in use
+_GENERATE_LOCK = threading.Lock()
+# CUDA availability and device count cannot change while the container runs; probe them once
+# instead of on every /health, /gpu-info and /generate request
+_CUDA_AVAILABLE = torch.cuda.is_available()
+_GPU_COUNT = torch.cuda.device_count() if _CUDA_AVAILABLE else 0
+# Longest a streaming response waits for the next chunk before giving up on the generation thread
+STREAM_TIMEOUT_SECONDS = 120
 
 def get_gpu_info():
     """Get GPU information for monitoring"""
@@ -54,9 +69,27 @@ def get_gpu_info():
         logging.warning(f"Could not get GPU info: {str(e)}")
         return []
 
+def generation_guard():
+    """Lock held around generate() while the shared static KV cache is in use"""
+    return _GENERATE_LOCK if cache_implementation == "static" else contextlib.nullcontext()
+
+def log_generation_complete(start_time, generated_text):
+    """Log timing, response size and post-generation GPU memory for a finished request"""
+    generation_time = time.time() - start_time
+    logging.info(f'✅ Generation completed in {generation_time:.2f} seconds')
+    logging.info(f'Response length: {len(generated_text)} characters')
+    
+    # Log GPU memory usage after generation
+    if _CUDA_AVAILABLE:
+        gpu_info = get_gpu_info()
+        for gpu in gpu_info:
+            logging.info(f"   Post-generation GPU {gpu['id']}: {gpu['used_memory_mb']}MB used")
+    
+    return generation_time
+
 def load_model():
     """Load GPT-OSS-20B model and tokenizer with optimization"""
-    global model, tokenizer, device
+    global model, tokenizer, device, cache_implementation
     
     try:
         logging.info('🚀 Starting GPT-OSS-20B initialization...')
@@ -65,9 +98,9 @@ def load_model():
         model_name = "openai/gpt-oss-20b"
         
         # Determine device
-        if torch.cuda.is_available():
+        if _CUDA_AVAILABLE:
             device = "cuda"
-            gpu_count = torch.cuda.device_count()
+            gpu_count = _GPU_COUNT
             gpu_name = torch.cuda.get_device_name(0) if gpu_count > 0 else "Unknown"
             logging.info(f'🔥 CUDA available! Using GPU: {gpu_name} (Count: {gpu_count})')
         else:
@@ -78,7 +111,7 @@ def load_model():
         tokenizer_start = time.time()
         tokenizer = AutoTokenizer.from_pretrained(
             model_name,
-            trust_remote_code=True,
+            use_fast=True,  # Rust tokenizers backend, never the slow Python fallback
             cache_dir='/app/cache'
         )
         
@@ -89,28 +122,60 @@ def load_model():
         tokenizer_time = time.time() - tokenizer_start
         logging.info(f'✅ Tokenizer loaded in {tokenizer_time:.2f} seconds')
         
-        # Configure quantization for memory efficiency
-        quantization_config = BitsAndBytesConfig(
-            load_in_4bit=True,
-            bnb_4bit_compute_dtype=torch.float16,
-            bnb_4bit_quant_type="nf4",
-            bnb_4bit_use_double_quant=True
-        )
+        # Configure quantization for memory efficiency - 4-bit NF4 weights, computed in
+        # bfloat16 where the GPU supports it (same exponent range as fp32, no overflow)
+        if device == "cuda":
+            compute_dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            quantization_config = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_compute_dtype=compute_dtype,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_use_double_quant=True
+            )
+        else:
+            # CPU fallback - bitsandbytes needs CUDA; bfloat16 keeps the 16-bit footprint and has CPU matmul kernels
+            compute_dtype = torch.bfloat16
+            quantization_config = None
         
-        # Load model with optimizations
-        model_start = time.time()
-        model = AutoModelForCausalLM.from_pretrained(
-            model_name,
-            torch_dtype=torch.float16,
+        # Attention kernels - the model's own implementation by default (gpt-oss attention sinks are not
+        # supported by the generic FlashAttention-2 kernels); MODEL_ATTN_IMPL overrides it, e.g. "sdpa"
+        attn_implementation = os.environ.get('MODEL_ATTN_IMPL') or None
+        load_kwargs = dict(
+            torch_dtype=compute_dtype,
             device_map="auto" if device == "cuda" else None,
-            trust_remote_code=True,
             low_cpu_mem_usage=True,
             cache_dir='/app/cache',
-            quantization_config=quantization_config if device == "cuda" else None
+            quantization_config=quantization_config
         )
         
+        # Load model with optimizations
+        model_start = time.time()
+        if attn_implementation:
+            logging.info(f'Attention implementation: {attn_implementation}')
+            try:
+                model = AutoModelForCausalLM.from_pretrained(model_name, attn_implementation=attn_implementation, **load_kwargs)
+            except (ValueError, ImportError) as e:
+                logging.warning(f'Attention implementation {attn_implementation} rejected, using model default: {str(e)}')
+                model = AutoModelForCausalLM.from_pretrained(model_name, **load_kwargs)
+        else:
+            model = AutoModelForCausalLM.from_pretrained(model_name, **load_kwargs)
+        
         if device == "cpu":
             model = model.to(device)
+        elif os.environ.get('MODEL_TORCH_COMPILE', '0') == '1':
+            # Compile the forward pass for the decode loop. Compilation is lazy, so run one forward
+            # here and fall back to the eager forward if it fails rather than failing the whole load
+            eager_forward = model.forward
+            try:
+                model.forward = torch.compile(eager_forward)
+                warmup_input = tokenizer('Hello', return_tensors='pt').to(device)
+                with torch.inference_mode():
+                    model(**warmup_input)
+                cache_implementation = "static"
+                logging.info('⚡ Model forward compiled with torch.compile, using static KV cache')
+            except Exception as e:
+                model.forward = eager_forward
+                logging.warning(f'torch.compile failed, using eager mode: {str(e)}')
             
         model_time = time.time() - model_start
         logging.info(f'✅ Model loaded in {model_time:.2f} seconds')
@@ -125,12 +190,14 @@ def load_model():
         logging.info('🧪 Testing model functionality...')
         test_input = tokenizer('Hello, I am', return_tensors='pt').to(device if device != "auto" else "cuda")
         
-        with torch.no_grad():
+        with torch.inference_mode():
             test_output = model.generate(
                 **test_input, 
                 max_new_tokens=10, 
                 do_sample=False,
-                pad_token_id=tokenizer.eos_token_id
+                pad_token_id=tokenizer.eos_token_id,
+                use_cache=True,
+                cache_implementation=cache_implementation
             )
         
         test_text = tokenizer.decode(test_output[0], skip_special_tokens=True)
@@ -143,6 +210,29 @@ def load_model():
         logging.error(f'❌ Model loading failed: {str(e)}')
         raise
 
+# Guards lazy loading when the app is served without running load_model() first (e.g. by gunicorn)
+_MODEL_LOCK = threading.Lock()
+
+def get_model():
+    """
+    Return the loaded (model, tokenizer), loading them once per process on first use.
+    Returns (None, None) while another request is still loading them.
+    """
+    if model is None:
+        if not _MODEL_LOCK.acquire(blocking=False):
+            return None, None
+        try:
+            if model is None:
+                load_model()
+        finally:
+            _MODEL_LOCK.release()
+    return model, tokenizer
+
+# When imported by a WSGI server the __main__ block below never runs, so page the weights in on a
+# background thread at worker start instead of making the first request pay the load time
+if __name__ != '__main__' and os.environ.get('MODEL_EAGER_LOAD', '1') == '1':
+    threading.Thread(target=get_model, name='model-warmup', daemon=True).start()
+
 @app.route('/', methods=['GET'])
 def root():
     """API documentation and status"""
@@ -164,7 +254,8 @@ def root():
             'body': {
                 'prompt': 'Your grant writing prompt here',
                 'max_new_tokens': 200,
-                'temperature': 0.7
+                'temperature': 0.7,
+                'stream': False
             }
         },
         'architecture': {
@@ -175,8 +266,8 @@ def root():
         },
         'hardware': {
             'device': device,
-            'cuda_available': torch.cuda.is_available(),
-            'gpu_count': torch.cuda.device_count() if torch.cuda.is_available() else 0
+            'cuda_available': _CUDA_AVAILABLE,
+            'gpu_count': _GPU_COUNT
         }
     })
 
@@ -195,7 +286,7 @@ def health():
         'timestamp': time.time(),
         'system_info': {
             'device': device,
-            'cuda_available': torch.cuda.is_available(),
+            'cuda_available': _CUDA_AVAILABLE,
             'cpu_usage_percent': cpu_usage,
             'memory_usage_percent': memory.percent,
             'available_memory_gb': memory.available / (1024**3)
@@ -203,7 +294,7 @@ def health():
     }
     
     # Add GPU info if available
-    if torch.cuda.is_available():
+    if _CUDA_AVAILABLE:
         health_data['gpu_info'] = get_gpu_info()
     
     return jsonify(health_data)
@@ -211,7 +302,7 @@ def health():
 @app.route('/gpu-info', methods=['GET'])
 def gpu_info():
     """Detailed GPU information endpoint"""
-    if not torch.cuda.is_available():
+    if not _CUDA_AVAILABLE:
         return jsonify({
             'cuda_available': False,
             'message': 'CUDA not available on this system'
@@ -219,15 +310,14 @@ def gpu_info():
     
     return jsonify({
         'cuda_available': True,
-        'gpu_count': torch.cuda.device_count(),
+        'gpu_count': _GPU_COUNT,
         'gpus': get_gpu_info()
     })
 
 @app.route('/generate', methods=['POST'])
 def generate():
     """Generate grant writing text using GPT-OSS-20B"""
-    global model, tokenizer, device
-    
+    model, tokenizer = get_model()
     if model is None or tokenizer is None:
         return jsonify({
             'error': 'Model not loaded - container may be starting up',
@@ -262,31 +352,55 @@ def generate():
         inputs = tokenizer(prompt, return_tensors='pt', truncation=True, max_length=2048)
         inputs = {k: v.to(device if device != "auto" else "cuda") for k, v in inputs.items()}
         
-        with torch.no_grad():
-            outputs = model.generate(
-                **inputs,
-                max_new_tokens=max_new_tokens,
-                temperature=temperature,
-                do_sample=True if temperature > 0 else False,
-                pad_token_id=tokenizer.eos_token_id,
-                repetition_penalty=1.1,
-                top_p=0.9,
-                top_k=50
-            )
+        generation_kwargs = dict(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            temperature=temperature,
+            do_sample=True if temperature > 0 else False,
+            pad_token_id=tokenizer.eos_token_id,
+            repetition_penalty=1.1,
+            top_p=0.9,
+            top_k=50,
+            use_cache=True,
+            cache_implementation=cache_implementation
+        )
+        
+        # Opt-in streaming: send decoded text as it is produced instead of after the last token
+        if data.get('stream'):
+            streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True,
+                                            timeout=STREAM_TIMEOUT_SECONDS)
+            
+            def run_generation():
+                # Inference mode is thread-local, so enter it inside the worker thread itself
+                try:
+                    with generation_guard(), torch.inference_mode():
+                        model.generate(**generation_kwargs, streamer=streamer)
+                except Exception as e:
+                    logging.error(f'❌ Generation error: {str(e)}')
+                    # generate() never reached streamer.end(); end the stream so the response closes
+                    streamer.end()
+            
+            def stream_text():
+                chunks = []
+                try:
+                    for chunk in streamer:
+                        chunks.append(chunk)
+                        yield chunk
+                except queue.Empty:
+                    logging.error(f'❌ Generation stalled: no output for {STREAM_TIMEOUT_SECONDS} seconds')
+                log_generation_complete(start_time, "".join(chunks))
+            
+            threading.Thread(target=run_generation, daemon=True).start()
+            return Response(stream_with_context(stream_text()), mimetype='text/plain')
+        
+        with generation_guard(), torch.inference_mode():
+            outputs = model.generate(**generation_kwargs)
         
         # Decode only the new tokens (exclude input prompt)
         new_tokens = outputs[0][inputs['input_ids'].shape[1]:]
         generated_text = tokenizer.decode(new_tokens, skip_special_tokens=True)
         
-        generation_time = time.time() - start_time
-        logging.info(f'✅ Generation completed in {generation_time:.2f} seconds')
-        logging.info(f'Response length: {len(generated_text)} characters')
-        
-        # Log GPU memory usage after generation
-        if torch.cuda.is_available():
-            gpu_info = get_gpu_info()
-            for gpu in gpu_info:
-                logging.info(f"   Post-generation GPU {gpu['id']}: {gpu['used_memory_mb']}MB used")
+        generation_time = log_generation_complete(start_time, generated_text)
         
         return jsonify({
             'generated_text': generated_text,
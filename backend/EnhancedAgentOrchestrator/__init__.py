@@ -14,6 +14,15 @@ from datetime import datetime
 # Add the DeepSeek multi-agent system to the path
 sys.path.append('/home/site/wwwroot/deepseek-multi-agent-system')
 
+# Enhanced system components, loaded once per worker. A failed import is raised by
+# process_with_enhanced_multiagent_system instead of breaking the health check.
+try:
+    from integrated_deepseek_mcp_system import IntegratedDeepSeekMCPSystem
+    from azure_mcp_research_tools import ResearchContext
+    _ENHANCED_IMPORT_ERROR = None
+except ImportError as e:
+    _ENHANCED_IMPORT_ERROR = e
+
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Enhanced Multi-Agent Orchestrator with DeepSeek R1 + Debugging
@@ -141,10 +150,9 @@ def process_with_enhanced_multiagent_system(prompt: str, debug_mode: bool, max_t
     try:
         logging.info('🤖 Loading Enhanced DeepSeek R1 Multi-Agent System...')
         
-        # Import the enhanced system components - NO FALLBACKS
-        from integrated_deepseek_mcp_system import IntegratedDeepSeekMCPSystem
-        from azure_mcp_research_tools import AzureMCPResearchTools, ResearchContext
-        from deepseek_r1_langgraph_workflow import DeepSeekR1Client
+        # Enhanced system components must have loaded - NO FALLBACKS
+        if _ENHANCED_IMPORT_ERROR is not None:
+            raise _ENHANCED_IMPORT_ERROR
         
         logging.info('✅ Enhanced system components loaded successfully')
         
@@ -203,8 +211,6 @@ def create_research_context_from_request(request_data: Dict) -> Dict:
     """
     Create a research context for the enhanced system from the request - NO FALLBACKS
     """
-    from azure_mcp_research_tools import ResearchContext
-    
     # Extract relevant information from request
     context_data = request_data.get('context', {})
     
@@ -1,58 +1,273 @@
 import azure.functions as func
-import requests
+import asyncio
+import hashlib
+import httpx
 import json
 import logging
 import os
+import uuid
+from typing import Dict, Optional, Tuple, Union
+from cachetools import LRUCache
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+try:
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps(obj) -> bytes:
+        """Serialize a response body"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:  # orjson not installed - fall back to stdlib json, which also accepts bytes
+    _loads = json.loads
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj)
+
+# Shared async HTTP client - reuses TCP/TLS connections to the model endpoint across invocations,
+# and lets concurrent invocations overlap their generation wait on the worker's event loop
+_HTTP = httpx.AsyncClient(
+    timeout=60,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+)
+
+# Successful responses to deterministic generation requests, keyed by a hash of endpoint + request body
+_GENERATION_CACHE = LRUCache(maxsize=512)
+# Deterministic generations currently running, so identical concurrent requests share one upstream call
+_INFLIGHT: Dict[bytes, asyncio.Future] = {}
+
+def _refresh_endpoint() -> None:
+    """(Re)load the target model endpoint settings from the environment.
+
+    Called once at import - settings don't change while a worker runs. Tests that
+    patch the environment call it again to pick up the new values.
+    """
+    global _ENDPOINT, _AUTH_KEY, _IS_MANAGED_ENDPOINT, _IS_OPENAI_CHAT_API, _HEALTH_URL, _MANAGED_HEALTH_BODY
+    _ENDPOINT = os.environ.get('AZURE_ML_GPT_OSS_ENDPOINT', os.environ.get('AZURE_ML_GEMMA_ENDPOINT', 'http://10.0.0.4:8000/generate'))
+    _AUTH_KEY = os.environ.get('AZURE_ML_GPT_OSS_KEY', os.environ.get('AZURE_ML_GEMMA_KEY', ''))
+    _IS_MANAGED_ENDPOINT = 'inference.ml.azure.com' in _ENDPOINT
+    _IS_OPENAI_CHAT_API = 'openai/deployments' in _ENDPOINT and 'chat/completions' in _ENDPOINT
+    _HEALTH_URL = _ENDPOINT.replace('/generate', '/health')
+    
+    # Static GET response for managed/OpenAI endpoints, which have no health route to probe
+    if _IS_MANAGED_ENDPOINT or _IS_OPENAI_CHAT_API:
+        _MANAGED_HEALTH_BODY = _dumps({
+            "proxy_status": "healthy",
+            "target_status": "managed_endpoint",
+            "endpoint": _ENDPOINT,
+            "model": "gpt-oss-120b" if _IS_OPENAI_CHAT_API else "gpt-oss-20b",
+            "type": "azure_openai_chat" if _IS_OPENAI_CHAT_API else "azure_ml_managed"
+        })
+    else:
+        _MANAGED_HEALTH_BODY = None
+
+_refresh_endpoint()
+
+def _generation_cache_key(endpoint: str, req_body: dict) -> Optional[bytes]:
+    """Cache key for a generation request, or None when sampling makes its output non-repeatable"""
+    # Only the managed endpoint forwards do_sample; the Flask and OpenAI backends sample whenever temperature > 0
+    greedy = req_body.get('temperature', 0.7) == 0 or (_IS_MANAGED_ENDPOINT and req_body.get('do_sample', True) is False)
+    if not greedy:
+        return None
+    payload = json.dumps([endpoint, req_body], sort_keys=True).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+async def generate(req_body: dict) -> Tuple[int, Union[bytes, str]]:
+    """
+    Forward one generation request to the configured model endpoint.
+    Returns (status_code, JSON body); shared by the HTTP proxy and the queued-job worker.
+    """
+    owns_inflight = False
+    try:
+        cache_key = _generation_cache_key(_ENDPOINT, req_body)
+        cached = _GENERATION_CACHE.get(cache_key) if cache_key else None
+        if cached is None and cache_key in _INFLIGHT:
+            # An identical request is already being generated - wait for it instead of
+            # sending a duplicate; if it fails we fall through and try ourselves
+            logging.info('⏳ Joining in-flight generation')
+            cached = await asyncio.shield(_INFLIGHT[cache_key])
+        elif cached is None and cache_key:
+            _INFLIGHT[cache_key] = asyncio.get_running_loop().create_future()
+            owns_inflight = True
+        if cached is not None:
+            logging.info('♻️ Returning cached generation')
+            return 200, cached
+
+        logging.info('📤 Forwarding request to: %s', _ENDPOINT)
+
+        if _IS_OPENAI_CHAT_API:
+            # Azure OpenAI format - handle both chat and instruct models
+            headers = {
+                'Content-Type': 'application/json',
+                'api-key': _AUTH_KEY
+            }
+
+            # Get model selection from request
+            requested_model = req_body.get('model', 'gpt-oss-120b')
+            logging.info('🤖 Requested model: %s', requested_model)
+
+            # Handle different model types
+            if requested_model == 'gpt-35-turbo-instruct':
+                # GPT-3.5-turbo-instruct uses Completions API (not Chat)
+                # We need to extract the prompt from messages
+                messages = req_body.get('messages', [])
+                prompt_text = messages[0].get('content', '') if messages else req_body.get('prompt', '')
+
+                # Update endpoint for completions API (if needed)
+                if 'chat/completions' in _ENDPOINT:
+                    endpoint_url = _ENDPOINT.replace('chat/completions', 'completions')
+                else:
+                    endpoint_url = _ENDPOINT
+
+                payload = {
+                    "prompt": prompt_text,
+                    "max_tokens": req_body.get('max_tokens', req_body.get('max_new_tokens', 150)),
+                    "temperature": req_body.get('temperature', 0.7),
+                    "model": "gpt-35-turbo-instruct"
+                }
+
+            else:
+                # GPT-OSS-120B and other chat models use Chat Completions API
+                messages = req_body.get('messages', [])
+                if not messages and req_body.get('prompt'):
+                    # Convert prompt to messages format
+                    messages = [{"role": "user", "content": req_body.get('prompt')}]
+
+                payload = {
+                    "messages": messages,
+                    "max_tokens": req_body.get('max_tokens', req_body.get('max_new_tokens', 150)),
+                    "temperature": req_body.get('temperature', 0.7)
+                }
+
+                endpoint_url = _ENDPOINT
+
+            # Add API version to URL if not present
+            if '?api-version=' not in endpoint_url:
+                endpoint_url += '?api-version=2024-02-01'
+
+        elif _IS_MANAGED_ENDPOINT:
+            # Azure ML Managed Endpoint format
+            headers = {
+                'Content-Type': 'application/json',
+                'Authorization': f'Bearer {_AUTH_KEY}'
+            }
+
+            # Convert Flask API format to managed endpoint format
+            endpoint_url = _ENDPOINT
+            payload = {
+                "input_data": {
+                    "input_string": [req_body.get('prompt', '')],
+                    "parameters": {
+                        "max_new_tokens": req_body.get('max_new_tokens', 150),
+                        "temperature": req_body.get('temperature', 0.7),
+                        "do_sample": req_body.get('do_sample', True)
+                    }
+                }
+            }
+        else:
+            # Flask API format
+            endpoint_url = _ENDPOINT
+            payload = req_body
+            headers = {'Content-Type': 'application/json'}
+
+        # Read the body as raw bytes in one pass - it is either decoded once by _loads
+        # or passed through untouched, never converted to str first
+        async with _HTTP.stream(
+            "POST",
+            endpoint_url,
+            json=payload,
+            timeout=60,  # 60 seconds for model generation
+            headers=headers
+        ) as response:
+            raw = await response.aread()
+
+        logging.info('📥 Received response with status: %s', response.status_code)
+
+        if response.status_code == 200:
+            if _IS_OPENAI_CHAT_API:
+                # Convert OpenAI chat completion response to Flask API format
+                openai_response = _loads(raw)
+                generated_text = ""
+                if 'choices' in openai_response and len(openai_response['choices']) > 0:
+                    generated_text = openai_response['choices'][0]['message']['content']
+
+                flask_format = {
+                    "generated_text": generated_text,
+                    "model": "gpt-oss-120b",
+                    "success": True,
+                    "source": "azure_openai_chat",
+                    "usage": openai_response.get('usage', {}),
+                    "full_response": openai_response
+                }
+                body = _dumps(flask_format)
+            elif _IS_MANAGED_ENDPOINT:
+                # Convert managed endpoint response to Flask API format
+                managed_response = _loads(raw)
+                flask_format = {
+                    "generated_text": managed_response.get('output', ''),
+                    "model": "gpt-oss-20b",
+                    "success": True,
+                    "source": "azure_ml_managed"
+                }
+                body = _dumps(flask_format)
+            else:
+                # Flask API response - return as is
+                body = raw
+
+            if cache_key:
+                _GENERATION_CACHE[cache_key] = body
+            return 200, body
+        else:
+            # Error response
+            return response.status_code, raw
+
+    except httpx.TimeoutException:
+        return 504, _dumps({
+            "error": "Request timeout - model generation took too long",
+            "success": False
+        })
+    except Exception as e:
+        logging.error('❌ Proxy error: %s', e)
+        return 500, _dumps({
+            "error": f"Proxy error: {str(e)}",
+            "success": False,
+            "endpoint": _ENDPOINT,
+            "model": "gpt-oss-20b"
+        })
+    finally:
+        if owns_inflight:
+            # Hand the result (or None on failure) to any requests that joined this one
+            _INFLIGHT.pop(cache_key).set_result(_GENERATION_CACHE.get(cache_key))
+
+async def main(req: func.HttpRequest, jobs: func.Out[str]) -> func.HttpResponse:
     """
     Azure Function to proxy requests to multiple LLM models (GPT-OSS-120B, GPT-3.5-turbo-instruct, etc.)
     """
     logging.info('🔄 Model Proxy function triggered')
     
     try:
-        # Get configuration - updated for GPT-OSS-20B
-        flask_endpoint = os.environ.get('AZURE_ML_GPT_OSS_ENDPOINT', os.environ.get('AZURE_ML_GEMMA_ENDPOINT', 'http://10.0.0.4:8000/generate'))
-        auth_key = os.environ.get('AZURE_ML_GPT_OSS_KEY', os.environ.get('AZURE_ML_GEMMA_KEY', ''))
-        
-        # Determine API type
-        is_managed_endpoint = 'inference.ml.azure.com' in flask_endpoint
-        is_openai_chat_api = 'openai/deployments' in flask_endpoint and 'chat/completions' in flask_endpoint
-        is_flask_api = flask_endpoint.startswith('http://10.0.0.4:8000') or flask_endpoint.startswith('http://132.196.98.227:8000') or (not is_openai_chat_api and 'gpt-oss' in flask_endpoint)
-        
         # Handle GET requests (health check)
         if req.method == 'GET':
-            if is_managed_endpoint or is_openai_chat_api:
+            if _MANAGED_HEALTH_BODY is not None:
                 # Managed/OpenAI endpoints don't have health endpoints, so return basic status
-                model_name = "gpt-oss-120b" if is_openai_chat_api else "gpt-oss-20b"
-                api_type = "azure_openai_chat" if is_openai_chat_api else "azure_ml_managed"
                 return func.HttpResponse(
-                    json.dumps({
-                        "proxy_status": "healthy",
-                        "target_status": "managed_endpoint",
-                        "endpoint": flask_endpoint,
-                        "model": model_name,
-                        "type": api_type
-                    }),
+                    _MANAGED_HEALTH_BODY,
                     status_code=200,
                     mimetype="application/json"
                 )
             else:
                 # Flask API health check
-                health_url = flask_endpoint.replace('/generate', '/health')
                 try:
-                    response = requests.get(health_url, timeout=10)
+                    response = await _HTTP.get(_HEALTH_URL, timeout=10)
                     if response.status_code == 200:
                         result = response.json()
                         result['proxy_status'] = 'healthy'
                         return func.HttpResponse(
-                            json.dumps(result),
+                            _dumps(result),
                             status_code=200,
                             mimetype="application/json"
                         )
                     else:
                         return func.HttpResponse(
-                            json.dumps({
+                            _dumps({
                                 "error": f"Flask API returned status {response.status_code}",
                                 "proxy_status": "healthy",
                                 "target_status": "error"
@@ -62,11 +277,11 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                         )
                 except Exception as e:
                     return func.HttpResponse(
-                        json.dumps({
+                        _dumps({
                             "error": f"Cannot reach Flask API: {str(e)}",
                             "proxy_status": "healthy", 
                             "target_status": "unreachable",
-                            "endpoint": flask_endpoint
+                            "endpoint": _ENDPOINT
                         }),
                         status_code=502,
                         mimetype="application/json"
@@ -74,193 +289,58 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         
         # Handle POST requests (text generation)
         elif req.method == 'POST':
+            # Get request body - parsed straight from the raw bytes
+            raw_body = req.get_body()
             try:
-                # Get request body
-                req_body = req.get_json()
-                if not req_body:
-                    return func.HttpResponse(
-                        json.dumps({"error": "No JSON body provided", "success": False}),
-                        status_code=400,
-                        mimetype="application/json"
-                    )
-                
-                logging.info(f'📤 Forwarding request to: {flask_endpoint}')
-                
-                if is_openai_chat_api:
-                    # Azure OpenAI format - handle both chat and instruct models
-                    headers = {
-                        'Content-Type': 'application/json',
-                        'api-key': auth_key
-                    }
-                    
-                    # Get model selection from request
-                    requested_model = req_body.get('model', 'gpt-oss-120b')
-                    logging.info(f'🤖 Requested model: {requested_model}')
-                    
-                    # Handle different model types
-                    if requested_model == 'gpt-35-turbo-instruct':
-                        # GPT-3.5-turbo-instruct uses Completions API (not Chat)
-                        # We need to extract the prompt from messages
-                        messages = req_body.get('messages', [])
-                        prompt_text = messages[0].get('content', '') if messages else req_body.get('prompt', '')
-                        
-                        # Update endpoint for completions API (if needed)
-                        if 'chat/completions' in flask_endpoint:
-                            endpoint_url = flask_endpoint.replace('chat/completions', 'completions')
-                        else:
-                            endpoint_url = flask_endpoint
-                        
-                        chat_payload = {
-                            "prompt": prompt_text,
-                            "max_tokens": req_body.get('max_tokens', req_body.get('max_new_tokens', 150)),
-                            "temperature": req_body.get('temperature', 0.7),
-                            "model": "gpt-35-turbo-instruct"
-                        }
-                        
-                    else:
-                        # GPT-OSS-120B and other chat models use Chat Completions API
-                        messages = req_body.get('messages', [])
-                        if not messages and req_body.get('prompt'):
-                            # Convert prompt to messages format
-                            messages = [{"role": "user", "content": req_body.get('prompt')}]
-                            
-                        chat_payload = {
-                            "messages": messages,
-                            "max_tokens": req_body.get('max_tokens', req_body.get('max_new_tokens', 150)),
-                            "temperature": req_body.get('temperature', 0.7)
-                        }
-                        
-                        endpoint_url = flask_endpoint
-                    
-                    # Add API version to URL if not present
-                    if '?api-version=' not in endpoint_url:
-                        endpoint_url += '?api-version=2024-02-01'
-                    
-                    response = requests.post(
-                        endpoint_url,
-                        json=chat_payload,
-                        timeout=60,
-                        headers=headers
-                    )
-                elif is_managed_endpoint:
-                    # Azure ML Managed Endpoint format
-                    headers = {
-                        'Content-Type': 'application/json',
-                        'Authorization': f'Bearer {auth_key}'
-                    }
-                    
-                    # Convert Flask API format to managed endpoint format
-                    managed_payload = {
-                        "input_data": {
-                            "input_string": [req_body.get('prompt', '')],
-                            "parameters": {
-                                "max_new_tokens": req_body.get('max_new_tokens', 150),
-                                "temperature": req_body.get('temperature', 0.7),
-                                "do_sample": req_body.get('do_sample', True)
-                            }
-                        }
-                    }
-                    
-                    response = requests.post(
-                        flask_endpoint,
-                        json=managed_payload,
-                        timeout=60,
-                        headers=headers
-                    )
-                else:
-                    # Flask API format
-                    response = requests.post(
-                        flask_endpoint,
-                        json=req_body,
-                        timeout=60,  # 60 seconds for model generation
-                        headers={'Content-Type': 'application/json'}
-                    )
-                
-                logging.info(f'📥 Received response with status: {response.status_code}')
-                
-                if response.status_code == 200:
-                    if is_openai_chat_api:
-                        # Convert OpenAI chat completion response to Flask API format
-                        openai_response = response.json()
-                        generated_text = ""
-                        if 'choices' in openai_response and len(openai_response['choices']) > 0:
-                            generated_text = openai_response['choices'][0]['message']['content']
-                        
-                        flask_format = {
-                            "generated_text": generated_text,
-                            "model": "gpt-oss-120b",
-                            "success": True,
-                            "source": "azure_openai_chat",
-                            "usage": openai_response.get('usage', {}),
-                            "full_response": openai_response
-                        }
-                        return func.HttpResponse(
-                            json.dumps(flask_format),
-                            status_code=200,
-                            mimetype="application/json"
-                        )
-                    elif is_managed_endpoint:
-                        # Convert managed endpoint response to Flask API format
-                        managed_response = response.json()
-                        flask_format = {
-                            "generated_text": managed_response.get('output', ''),
-                            "model": "gpt-oss-20b",
-                            "success": True,
-                            "source": "azure_ml_managed"
-                        }
-                        return func.HttpResponse(
-                            json.dumps(flask_format),
-                            status_code=200,
-                            mimetype="application/json"
-                        )
-                    else:
-                        # Flask API response - return as is
-                        return func.HttpResponse(
-                            response.text,
-                            status_code=response.status_code,
-                            mimetype="application/json"
-                        )
-                else:
-                    # Error response
-                    return func.HttpResponse(
-                        response.text,
-                        status_code=response.status_code,
-                        mimetype="application/json"
-                    )
-                
-            except requests.exceptions.Timeout:
+                req_body = _loads(raw_body) if raw_body else None
+            except ValueError:
                 return func.HttpResponse(
-                    json.dumps({
-                        "error": "Request timeout - model generation took too long",
-                        "success": False
-                    }),
-                    status_code=504,
+                    _dumps({"error": "Request body is not valid JSON", "success": False}),
+                    status_code=400,
                     mimetype="application/json"
                 )
-            except Exception as e:
-                logging.error(f'❌ Proxy error: {str(e)}')
+            if not req_body:
+                return func.HttpResponse(
+                    _dumps({"error": "No JSON body provided", "success": False}),
+                    status_code=400,
+                    mimetype="application/json"
+                )
+            
+            if req_body.get('async') is True:
+                # Non-interactive callers: queue the generation for ModelProxyWorker and return
+                # at once; the result is fetched later from ModelProxyJobStatus
+                job_id = uuid.uuid4().hex
+                job_request = {k: v for k, v in req_body.items() if k != 'async'}
+                jobs.set(json.dumps({"id": job_id, "request": job_request}))
+                logging.info('📨 Queued generation job %s', job_id)
                 return func.HttpResponse(
-                    json.dumps({
-                        "error": f"Proxy error: {str(e)}",
-                        "success": False,
-                        "endpoint": flask_endpoint,
-                        "model": "gpt-oss-20b"
+                    _dumps({
+                        "job_id": job_id,
+                        "status": "queued",
+                        "status_url": f"/api/modelproxy/jobs/{job_id}"
                     }),
-                    status_code=500,
+                    status_code=202,
                     mimetype="application/json"
                 )
+            
+            status_code, body = await generate(req_body)
+            return func.HttpResponse(
+                body,
+                status_code=status_code,
+                mimetype="application/json"
+            )
         
         else:
             return func.HttpResponse(
-                json.dumps({"error": "Method not allowed", "allowed": ["GET", "POST"]}),
+                _dumps({"error": "Method not allowed", "allowed": ["GET", "POST"]}),
                 status_code=405,
                 mimetype="application/json"
             )
             
     except Exception as e:
-        logging.error(f'❌ ModelProxy function error: {str(e)}')
+        logging.error('❌ ModelProxy function error: %s', e)
         return func.HttpResponse(
-            json.dumps({
+            _dumps({
                 "error": f"Function error: {str(e)}",
                 "success": False
             }),
@@ -0,0 +1,22 @@
+import azure.functions as func
+import json
+
+def main(req: func.HttpRequest, result: func.InputStream) -> func.HttpResponse:
+    """
+    Status endpoint for queued ModelProxy generation jobs.
+    Returns the stored result once ModelProxyWorker has written it, otherwise 202 pending.
+    """
+    job_id = req.route_params.get('job_id')
+    
+    if result is None:
+        return func.HttpResponse(
+            json.dumps({"job_id": job_id, "status": "pending"}),
+            status_code=202,
+            mimetype="application/json"
+        )
+    
+    return func.HttpResponse(
+        result.read(),
+        status_code=200,
+        mimetype="application/json"
+    )
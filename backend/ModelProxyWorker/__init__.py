@@ -0,0 +1,29 @@
+import azure.functions as func
+import json
+import logging
+
+from ModelProxy import generate
+
+async def main(msg: func.QueueMessage, result: func.Out[str]) -> None:
+    """
+    Queue-triggered worker for generation jobs queued by ModelProxy with "async": true.
+    Stores the outcome as model-proxy-results/<job id>.json for ModelProxyJobStatus.
+    """
+    job = msg.get_json()
+    job_id = job['id']
+    logging.info('⚙️ Model Proxy worker running job %s', job_id)
+    
+    status_code, body = await generate(job['request'])
+    try:
+        response = json.loads(body)
+    except ValueError:
+        # Upstream error bodies are not always JSON - keep them as text
+        response = body.decode('utf-8', 'replace') if isinstance(body, bytes) else body
+    
+    result.set(json.dumps({
+        "job_id": job_id,
+        "status": "completed" if status_code == 200 else "failed",
+        "status_code": status_code,
+        "response": response
+    }))
+    logging.info('✅ Model Proxy job %s finished with status %s', job_id, status_code)
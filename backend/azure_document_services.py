@@ -4,8 +4,11 @@ Advanced document extraction for DeepSeek R1 Multi-Agent System
 """
 
 import os
-import json
+import copy
+import asyncio
 import logging
+import hashlib
+import functools
 from typing import Dict, Any, List
 import io
 from azure.ai.formrecognizer import DocumentAnalysisClient
@@ -13,8 +16,20 @@ from azure.cognitiveservices.vision.computervision import ComputerVisionClient
 from azure.core.credentials import AzureKeyCredential
 from msrest.authentication import CognitiveServicesCredentials
 from dataclasses import dataclass
+from cachetools import TTLCache
 
-@dataclass
+# Documents analyzed at once by process_documents_batch
+DOCUMENT_BATCH_CONCURRENCY = 16
+
+# Successful extractions on this worker, keyed by the SHA-256 of the PDF bytes.
+# Review workflows re-read the same uploads; a day keeps re-runs off the billed API.
+_EXTRACTION_CACHE = TTLCache(maxsize=64, ttl=86400)
+
+def clear_extraction_cache():
+    """Drop all cached document extractions"""
+    _EXTRACTION_CACHE.clear()
+
+@dataclass(slots=True)
 class ExtractedTable:
     """Structured representation of a table"""
     row_count: int
@@ -23,7 +38,7 @@ class ExtractedTable:
     data: List[List[str]]
     confidence: float
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedContent:
     """Complete document extraction result"""
     text_content: str
@@ -33,6 +48,16 @@ class ExtractedContent:
     visual_elements: List[Dict[str, Any]]
     metadata: Dict[str, Any]
 
+@functools.lru_cache(maxsize=None)
+def _document_analysis_client(endpoint: str, key: str) -> DocumentAnalysisClient:
+    """One Document Intelligence client (and connection pool) per endpoint/key"""
+    return DocumentAnalysisClient(endpoint=endpoint, credential=AzureKeyCredential(key))
+
+@functools.lru_cache(maxsize=None)
+def _computer_vision_client(endpoint: str, key: str) -> ComputerVisionClient:
+    """One Computer Vision client (and connection pool) per endpoint/key"""
+    return ComputerVisionClient(endpoint=endpoint, credentials=CognitiveServicesCredentials(key))
+
 class AzureDocumentExtractor:
     """Azure Document Intelligence for advanced PDF extraction"""
     
@@ -42,19 +67,30 @@ class AzureDocumentExtractor:
         
         if not self.key or self.key == 'not_set':
             raise ValueError("Azure Document Intelligence key not configured")
-        
-        self.client = DocumentAnalysisClient(
-            endpoint=self.endpoint,
-            credential=AzureKeyCredential(self.key)
-        )
+    
+    @property
+    def client(self) -> DocumentAnalysisClient:
+        """Shared client, built on first use"""
+        return _document_analysis_client(self.endpoint, self.key)
+    
+    def _analyze_layout(self, pdf_content: bytes):
+        """Blocking prebuilt-layout analysis; run off the event loop"""
+        poller = self.client.begin_analyze_document("prebuilt-layout", pdf_content)
+        return poller.result()
     
     async def extract_document_content(self, pdf_content: bytes) -> ExtractedContent:
         """Extract comprehensive content from PDF using Azure Document Intelligence"""
         
+        cache_key = hashlib.sha256(pdf_content).hexdigest()
+        cached = _EXTRACTION_CACHE.get(cache_key)
+        if cached is not None:
+            logging.info(f"Document extraction cache hit: {cache_key[:12]}")
+            # Callers receive the nested lists/dicts directly, so never hand out the cached object itself
+            return copy.deepcopy(cached)
+        
         try:
             # Use the prebuilt-layout model for comprehensive extraction
-            poller = self.client.begin_analyze_document("prebuilt-layout", pdf_content)
-            result = poller.result()
+            result = await asyncio.to_thread(self._analyze_layout, pdf_content)
             
             # Extract text content
             text_content = result.content if result.content else ""
@@ -64,16 +100,15 @@ class AzureDocumentExtractor:
             if result.tables:
                 for table in result.tables:
                     # Build table structure
-                    table_data = [['' for _ in range(table.column_count)] for _ in range(table.row_count)]
-                    headers = []
+                    row_count, column_count = table.row_count, table.column_count
+                    table_data = [[''] * column_count for _ in range(row_count)]
                     
                     for cell in table.cells:
-                        if cell.row_index < len(table_data) and cell.column_index < len(table_data[0]):
+                        if cell.row_index < row_count and cell.column_index < column_count:
                             table_data[cell.row_index][cell.column_index] = cell.content or ""
-                            
-                            # Collect headers (first row)
-                            if cell.row_index == 0:
-                                headers.append(cell.content or "")
+                    
+                    # Headers are the first row, one entry per column
+                    headers = list(table_data[0]) if table_data else []
                     
                     extracted_table = ExtractedTable(
                         row_count=table.row_count,
@@ -113,16 +148,17 @@ class AzureDocumentExtractor:
                     layout_sections.append(section)
             
             # Metadata
+            languages = getattr(result, 'languages', None) or ()
             metadata = {
-                "page_count": len(result.pages) if result.pages else 0,
-                "language": getattr(result, 'languages', [{}])[0].get('locale', 'unknown') if hasattr(result, 'languages') and result.languages else 'unknown',
+                "page_count": len(result.pages or ()),
+                "language": (getattr(languages[0], 'locale', None) or 'unknown') if languages else 'unknown',
                 "extraction_method": "azure_document_intelligence",
                 "model_used": "prebuilt-layout"
             }
             
             logging.info(f"Extracted {len(text_content)} characters, {len(tables)} tables, {len(form_fields)} form fields")
             
-            return ExtractedContent(
+            extracted = ExtractedContent(
                 text_content=text_content,
                 tables=tables,
                 form_fields=form_fields,
@@ -130,6 +166,8 @@ class AzureDocumentExtractor:
                 visual_elements=[],  # Will be filled by Computer Vision
                 metadata=metadata
             )
+            _EXTRACTION_CACHE[cache_key] = copy.deepcopy(extracted)
+            return extracted
             
         except Exception as e:
             logging.error(f"Document Intelligence extraction failed: {e}")
@@ -152,11 +190,11 @@ class AzureComputerVisionAnalyzer:
         
         if not self.key or self.key == 'not_set':
             raise ValueError("Azure Computer Vision key not configured")
-        
-        self.client = ComputerVisionClient(
-            endpoint=self.endpoint,
-            credentials=CognitiveServicesCredentials(self.key)
-        )
+    
+    @property
+    def client(self) -> ComputerVisionClient:
+        """Shared client, built on first use"""
+        return _computer_vision_client(self.endpoint, self.key)
     
     async def analyze_visual_content(self, pdf_content: bytes) -> List[Dict[str, Any]]:
         """Analyze visual elements in the document"""
@@ -208,11 +246,18 @@ class EnhancedDocumentProcessor:
         
         logging.info("Starting enhanced document processing...")
         
-        # Step 1: Extract structured content
-        extracted_content = await self.document_extractor.extract_document_content(pdf_content)
-        
-        # Step 2: Analyze visual elements
-        visual_elements = await self.vision_analyzer.analyze_visual_content(pdf_content)
+        # Steps 1 & 2: Extract structured content and analyze visual elements concurrently
+        extracted_content, visual_elements = await asyncio.gather(
+            self.document_extractor.extract_document_content(pdf_content),
+            self.vision_analyzer.analyze_visual_content(pdf_content),
+            return_exceptions=True
+        )
+        if isinstance(extracted_content, BaseException):
+            raise extracted_content
+        if isinstance(visual_elements, BaseException):
+            # A vision failure should not discard the extraction result
+            logging.error(f"Computer Vision analysis failed: {visual_elements}")
+            visual_elements = [{"error": str(visual_elements), "analysis_method": "failed"}]
         
         # Step 3: Combine results
         enhanced_content = {
@@ -249,41 +294,57 @@ class EnhancedDocumentProcessor:
             "grant_context": grant_context
         }
     
+    async def process_documents_batch(self, pdfs: List[bytes]) -> List[Dict[str, Any]]:
+        """Process several documents concurrently; results keep the input order"""
+        
+        semaphore = asyncio.Semaphore(DOCUMENT_BATCH_CONCURRENCY)
+        
+        async def process_one(pdf_content: bytes) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.process_document(pdf_content)
+        
+        return await asyncio.gather(*(process_one(pdf) for pdf in pdfs))
+    
     def _create_grant_context(self, content: Dict[str, Any]) -> str:
         """Create rich context string for DeepSeek R1 agents"""
         
-        context_parts = []
-        
-        # Add main text
-        context_parts.append(f"DOCUMENT TEXT:\n{content['structured_text']}\n")
+        # Main text goes in as its own part so the (large) document body is not re-copied into an f-string
+        context_parts = ["DOCUMENT TEXT:", content['structured_text'], ""]
         
         # Add table information
         if content['tables']:
             context_parts.append("EXTRACTED TABLES:")
-            for i, table in enumerate(content['tables']):
-                context_parts.append(f"Table {i+1} ({table['dimensions']}):")
+            for i, table in enumerate(content['tables'], 1):
+                context_parts.append(f"Table {i} ({table['dimensions']}):")
                 if table['headers']:
-                    context_parts.append(f"Headers: {', '.join(table['headers'])}")
+                    context_parts.append("Headers: " + ", ".join(table['headers']))
                 context_parts.append("")
         
         # Add form fields
         if content['form_fields']:
             context_parts.append("FORM FIELDS:")
-            for key, value in content['form_fields'].items():
-                context_parts.append(f"{key}: {value}")
+            context_parts.extend(f"{key}: {value}" for key, value in content['form_fields'].items())
             context_parts.append("")
         
         # Add layout information
         layout = content['layout_analysis']
-        context_parts.append(f"DOCUMENT STRUCTURE:")
-        context_parts.append(f"Pages: {layout.get('page_count', 'unknown')}")
-        context_parts.append(f"Sections: {len(layout.get('sections', []))}")
+        context_parts += [
+            "DOCUMENT STRUCTURE:",
+            f"Pages: {layout.get('page_count', 'unknown')}",
+            f"Sections: {len(layout.get('sections', []))}",
+        ]
         
         return "\n".join(context_parts)
 
-# Global instance for use in Azure Functions
-enhanced_processor = EnhancedDocumentProcessor()
+@functools.lru_cache(maxsize=1)
+def _get_processor() -> EnhancedDocumentProcessor:
+    """Processor shared by Azure Functions invocations, created on first request"""
+    return EnhancedDocumentProcessor()
 
 async def process_document_with_azure_services(pdf_content: bytes) -> Dict[str, Any]:
     """Main function for Azure Functions integration"""
-    return await enhanced_processor.process_document(pdf_content)
\ No newline at end of file
+    return await _get_processor().process_document(pdf_content)
+
+async def process_documents_batch_with_azure_services(pdfs: List[bytes]) -> List[Dict[str, Any]]:
+    """Batch entry point for Azure Functions integration"""
+    return await _get_processor().process_documents_batch(pdfs)
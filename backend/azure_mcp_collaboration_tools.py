@@ -10,9 +10,6 @@ from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from enum import Enum
 import asyncio
-from azure.storage.blob import BlobServiceClient
-from azure.servicebus import ServiceBusClient, ServiceBusMessage
-from azure.cosmos import CosmosClient, PartitionKey
 import os
 
 class CollaborationMessageType(Enum):
@@ -79,8 +76,10 @@ class AzureMCPCollaborationTools:
     def _initialize_azure_services(self):
         """Initialize Azure services for collaboration"""
         try:
+            # SDK imports are deferred to here so only configured services load their SDKs
             # Azure Blob Storage for shared artifacts (covered by credits)
             if self.storage_account_key:
+                from azure.storage.blob import BlobServiceClient
                 self.blob_service_client = BlobServiceClient(
                     account_url=f"https://{self.storage_account_name}.blob.core.windows.net",
                     credential=self.storage_account_key
@@ -89,6 +88,7 @@ class AzureMCPCollaborationTools:
             
             # Azure Service Bus for real-time messaging (covered by credits)
             if self.servicebus_connection_string:
+                from azure.servicebus import ServiceBusClient
                 self.servicebus_client = ServiceBusClient.from_connection_string(
                     self.servicebus_connection_string
                 )
@@ -96,6 +96,7 @@ class AzureMCPCollaborationTools:
             
             # Azure Cosmos DB for task management (covered by credits)
             if self.cosmos_endpoint and self.cosmos_key:
+                from azure.cosmos import CosmosClient, PartitionKey
                 self.cosmos_client = CosmosClient(self.cosmos_endpoint, self.cosmos_key)
                 database = self.cosmos_client.create_database_if_not_exists("GrantCollaboration")
                 
@@ -398,6 +399,7 @@ class AzureMCPCollaborationTools:
         """Send real-time notification via Azure Service Bus"""
         try:
             if self.servicebus_client:
+                from azure.servicebus import ServiceBusMessage
                 sender = self.servicebus_client.get_queue_sender(queue_name="agent-notifications")
                 
                 message = ServiceBusMessage(
@@ -421,6 +423,7 @@ class AzureMCPCollaborationTools:
         """Send status update notification"""
         try:
             if self.servicebus_client:
+                from azure.servicebus import ServiceBusMessage
                 sender = self.servicebus_client.get_queue_sender(queue_name="agent-notifications")
                 
                 message = ServiceBusMessage(
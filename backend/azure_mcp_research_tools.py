@@ -4,16 +4,17 @@ Uses Azure services with your existing credits - no additional costs!
 """
 
 import json
-import requests
+import re
 import os
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import asyncio
-from azure.search.documents import SearchClient
-from azure.core.credentials import AzureKeyCredential
-from azure.cognitiveservices.search.websearch import WebSearchClient
-from msrest.authentication import CognitiveServicesCredentials
+
+# Snippet keyword classifiers, compiled once so each snippet is scanned a single time per alternation
+# (a single literal keyword stays a plain substring check)
+_REQUIREMENT_RE = re.compile(r"requirement|eligibility|criteria")
+_AWARD_RE = re.compile(r"awarded|funded|successful")
 
 @dataclass
 class SearchResult:
@@ -55,7 +56,11 @@ class AzureMCPResearchTools:
         """Initialize Azure service clients"""
         try:
             # Bing Web Search (covered by Azure credits)
+            # SDK imports are deferred to here so importing this module (e.g. for ResearchContext)
+            # does not pay for loading the Azure SDKs, and unconfigured services never load theirs
             if self.bing_subscription_key:
+                from azure.cognitiveservices.search.websearch import WebSearchClient
+                from msrest.authentication import CognitiveServicesCredentials
                 self.web_search_client = WebSearchClient(
                     endpoint="https://api.cognitive.microsoft.com/bing/v7.0/search",
                     credentials=CognitiveServicesCredentials(self.bing_subscription_key)
@@ -64,6 +69,8 @@ class AzureMCPResearchTools:
             
             # Azure Cognitive Search (covered by Azure credits)
             if self.cognitive_search_key and self.cognitive_search_endpoint:
+                from azure.search.documents import SearchClient
+                from azure.core.credentials import AzureKeyCredential
                 self.search_client = SearchClient(
                     endpoint=self.cognitive_search_endpoint,
                     index_name="grants-knowledge-base",
@@ -207,7 +214,8 @@ class AzureMCPResearchTools:
         # Extract structured information from results
         for result in all_results:
             # Use simple keyword extraction (can be enhanced with Azure AI Language)
-            if "funding" in result.snippet.lower():
+            snippet = result.snippet.lower()
+            if "funding" in snippet:
                 funder_profile["funding_opportunities"].append({
                     "source": result.title,
                     "url": result.url,
@@ -215,7 +223,7 @@ class AzureMCPResearchTools:
                     "relevance": result.relevance_score
                 })
             
-            if any(word in result.snippet.lower() for word in ["requirement", "eligibility", "criteria"]):
+            if _REQUIREMENT_RE.search(snippet):
                 funder_profile["requirements"].append({
                     "source": result.title,
                     "requirement": result.snippet[:150],
@@ -256,7 +264,7 @@ class AzureMCPResearchTools:
         
         # Analyze competitive patterns
         for result in all_results:
-            if any(word in result.snippet.lower() for word in ["awarded", "funded", "successful"]):
+            if _AWARD_RE.search(result.snippet.lower()):
                 competitive_data["successful_projects"].append({
                     "title": result.title,
                     "description": result.snippet[:200],
@@ -350,15 +358,19 @@ RESEARCH_TOOLS = {
     }
 }
 
+_research_tools = None
+
 def create_research_tools():
-    """Initialize Azure-powered MCP research tools"""
-    tools = AzureMCPResearchTools()
-    
-    print("🔍 Azure MCP Research Tools initialized:")
-    for tool_name, tool_info in RESEARCH_TOOLS.items():
-        print(f"  ✅ {tool_info['name']} - {tool_info['azure_service']}")
+    """Return the process-wide Azure-powered MCP research tools, initializing them on first use"""
+    global _research_tools
+    if _research_tools is None:
+        _research_tools = AzureMCPResearchTools()
+        
+        print("🔍 Azure MCP Research Tools initialized:")
+        for tool_name, tool_info in RESEARCH_TOOLS.items():
+            print(f"  ✅ {tool_info['name']} - {tool_info['azure_service']}")
     
-    return tools
+    return _research_tools
 
 if __name__ == "__main__":
     # Test the research tools
@@ -11,9 +11,6 @@ from datetime import datetime, timedelta
 from enum import Enum
 import os
 from decimal import Decimal, ROUND_HALF_UP
-from azure.ai.language.questionanswering import QuestionAnsweringClient
-from azure.core.credentials import AzureKeyCredential
-from azure.ai.textanalytics import TextAnalyticsClient
 
 class ValidationResult(Enum):
     """Validation results"""
@@ -90,8 +87,11 @@ class AzureMCPValidationTools:
     def _initialize_azure_services(self):
         """Initialize Azure AI services for validation"""
         try:
+            # SDK imports are deferred to here so only configured services load their SDKs
             # Azure AI Language for text analysis (covered by credits)
             if self.language_endpoint and self.language_key:
+                from azure.core.credentials import AzureKeyCredential
+                from azure.ai.textanalytics import TextAnalyticsClient
                 credential = AzureKeyCredential(self.language_key)
                 self.text_analytics_client = TextAnalyticsClient(
                     endpoint=self.language_endpoint,
@@ -101,6 +101,8 @@ class AzureMCPValidationTools:
             
             # Azure AI Question Answering for compliance checking (covered by credits)  
             if self.qa_endpoint and self.qa_key:
+                from azure.core.credentials import AzureKeyCredential
+                from azure.ai.language.questionanswering import QuestionAnsweringClient
                 credential = AzureKeyCredential(self.qa_key)
                 self.qa_client = QuestionAnsweringClient(
                     endpoint=self.qa_endpoint,
@@ -730,15 +732,19 @@ VALIDATION_TOOLS = {
     }
 }
 
+_validation_tools = None
+
 def create_validation_tools():
-    """Initialize Azure-powered MCP validation tools"""
-    tools = AzureMCPValidationTools()
-    
-    print("✅ Azure MCP Validation Tools initialized:")
-    for tool_name, tool_info in VALIDATION_TOOLS.items():
-        print(f"  ✅ {tool_info['name']} - {tool_info['azure_service']}")
+    """Return the process-wide Azure-powered MCP validation tools, initializing them on first use"""
+    global _validation_tools
+    if _validation_tools is None:
+        _validation_tools = AzureMCPValidationTools()
+        
+        print("✅ Azure MCP Validation Tools initialized:")
+        for tool_name, tool_info in VALIDATION_TOOLS.items():
+            print(f"  ✅ {tool_info['name']} - {tool_info['azure_service']}")
     
-    return tools
+    return _validation_tools
 
 if __name__ == "__main__":
     # Test validation tools
@@ -116,13 +116,16 @@ COMMON_SETTINGS = {
     "total_parameters": "671B"
 }
 
+# Full per-agent configurations, merged once at import instead of on every chat completion
+_AGENT_CONFIGS = {
+    agent_name: {**prompt, **COMMON_SETTINGS}
+    for agent_name, prompt in AGENT_PROMPTS.items()
+}
+
 def get_agent_prompt(agent_name: str) -> dict:
-    """Get specialized prompt configuration for specific agent."""
-    if agent_name in AGENT_PROMPTS:
-        return {
-            **AGENT_PROMPTS[agent_name],
-            **COMMON_SETTINGS
-        }
+    """Get specialized prompt configuration for specific agent (shared - treat as read-only)."""
+    if agent_name in _AGENT_CONFIGS:
+        return _AGENT_CONFIGS[agent_name]
     else:
         raise ValueError(f"Unknown agent: {agent_name}")
 
@@ -4,6 +4,8 @@ Grant Writing System with 671B Parameter Reasoning for Every Agent
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from typing import Dict, List, Any
 from dataclasses import dataclass
@@ -40,6 +42,30 @@ class DeepSeekR1Client:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
+        
+        # One pooled keep-alive session per client: agents reuse the TLS connection to the endpoint
+        # instead of handshaking on every completion. Connect errors and 429/5xx responses are retried
+        # up to 3 times (paced by the endpoint's Retry-After when it sends one); a read timeout is never
+        # retried, since the endpoint may still be generating - resending would pay for the completion again
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=3,
+                read=0,
+                other=0,
+                backoff_factor=0.25,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset({"POST"}),
+                raise_on_status=False  # Hand back the final response so raise_for_status reports its real status
+            )
+        ))
+    
+    def close(self):
+        """Release the pooled connections (call on shutdown)"""
+        self._session.close()
     
     def chat_completion(self, messages: List[Dict], agent_name: str) -> str:
         """Send chat completion request to DeepSeek R1"""
@@ -53,9 +79,8 @@ class DeepSeekR1Client:
         }
         
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{self.endpoint}/chat/completions",
-                headers=self.headers,
                 json=payload,
                 timeout=120  # DeepSeek R1 reasoning can take time
             )
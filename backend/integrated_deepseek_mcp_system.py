@@ -5,6 +5,8 @@ Complete multi-agent grant writing system with inter-agent communication and MCP
 
 import json
 import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -16,11 +18,25 @@ from langgraph.checkpoint.sqlite import SqliteSaver
 from deepseek_r1_config import DEEPSEEK_R1_ENDPOINT, DEEPSEEK_R1_API_KEY, AGENT_MODELS
 from deepseek_r1_agent_prompts import get_agent_prompt
 from inter_agent_communication import CommunicationBus, AgentCommunicator, CollaborationMessageType
-from azure_mcp_research_tools import AzureMCPResearchTools, ResearchContext
+from azure_mcp_research_tools import ResearchContext, create_research_tools
 from azure_mcp_collaboration_tools import AzureMCPCollaborationTools
-from azure_mcp_validation_tools import AzureMCPValidationTools
+from azure_mcp_validation_tools import create_validation_tools
 from deepseek_r1_langgraph_workflow import DeepSeekR1Client
 
+_FUNDING_AMOUNT_RE = re.compile(r'\$[\d,]+(?:K|M|k|m|,000|,000,000)?')
+# Funders recognised by name in opportunity text, with their lowercased match form
+_COMMON_FUNDERS = tuple(
+    (funder, funder.lower())
+    for funder in ("NSF", "NIH", "DOE", "NASA", "DARPA", "Gates Foundation")
+)
+
+# Worker threads for the blocking SDK/HTTP calls the async nodes hand to asyncio.to_thread; the default
+# executor (cpu_count + 4 threads) would queue the per-agent calls on small Function hosts
+BLOCKING_IO_WORKERS = 32
+
+# Longest wait for agents to answer a consensus request; polling starts at 50 ms and backs off to 1 s
+CONSENSUS_WAIT_SECONDS = 1.0
+
 @dataclass
 class EnhancedGrantApplicationState:
     """Enhanced state with MCP tools and inter-agent communication"""
@@ -66,9 +82,9 @@ class IntegratedDeepSeekMCPSystem:
         self.communication_bus = CommunicationBus()
         
         # Initialize MCP tools (using Azure credits)
-        self.research_tools = AzureMCPResearchTools()
+        self.research_tools = create_research_tools()
         self.collaboration_tools = AzureMCPCollaborationTools()
-        self.validation_tools = AzureMCPValidationTools()
+        self.validation_tools = create_validation_tools()
         
         # Agent communicators
         self.agent_communicators = {}
@@ -145,7 +161,8 @@ class IntegratedDeepSeekMCPSystem:
         
         # Get initial web research
         if state.mcp_tools_available:
-            search_results = self.research_tools.web_search(
+            search_results = await asyncio.to_thread(
+                self.research_tools.web_search,
                 f"grant opportunities {state.grant_opportunity}", 
                 research_context, 
                 count=5
@@ -183,7 +200,7 @@ class IntegratedDeepSeekMCPSystem:
             """}
         ]
         
-        response = self.deepseek_client.chat_completion(messages, agent_name)
+        response = await asyncio.to_thread(self.deepseek_client.chat_completion, messages, agent_name)
         state.agent_outputs[agent_name] = response
         state.workflow_status = "strategic_planning_complete"
         
@@ -195,7 +212,8 @@ class IntegratedDeepSeekMCPSystem:
         ]
         
         for target_agent, task_desc in collaboration_tasks:
-            task_id = self.collaboration_tools.create_collaboration_task(
+            task_id = await asyncio.to_thread(
+                self.collaboration_tools.create_collaboration_task,
                 requester=agent_name,
                 assignee=target_agent,
                 task_type=CollaborationMessageType.TASK_REQUEST,
@@ -228,15 +246,16 @@ class IntegratedDeepSeekMCPSystem:
             )
             
             # Comprehensive funder research using Azure credits
-            funder_profile = self.research_tools.funder_research(funder_name, research_context)
+            funder_profile = await asyncio.to_thread(self.research_tools.funder_research, funder_name, research_context)
             state.funder_profile = funder_profile
             
             # Competitive analysis
-            competitive_analysis = self.research_tools.competitive_analysis(research_context)
+            competitive_analysis = await asyncio.to_thread(self.research_tools.competitive_analysis, research_context)
             state.competitive_analysis = competitive_analysis
             
             # Share research artifacts with other agents
-            artifact_id = self.collaboration_tools.share_artifact(
+            artifact_id = await asyncio.to_thread(
+                self.collaboration_tools.share_artifact,
                 creator=agent_name,
                 artifact_name="Comprehensive Funder Research",
                 artifact_type="research",
@@ -273,7 +292,7 @@ class IntegratedDeepSeekMCPSystem:
             """}
         ]
         
-        response = self.deepseek_client.chat_completion(messages, agent_name)
+        response = await asyncio.to_thread(self.deepseek_client.chat_completion, messages, agent_name)
         state.research_findings = response
         state.agent_outputs[agent_name] = response
         
@@ -314,7 +333,7 @@ class IntegratedDeepSeekMCPSystem:
             """}
         ]
         
-        response = self.deepseek_client.chat_completion(messages, agent_name)
+        response = await asyncio.to_thread(self.deepseek_client.chat_completion, messages, agent_name)
         state.budget_analysis = response
         state.agent_outputs[agent_name] = response
         
@@ -324,12 +343,13 @@ class IntegratedDeepSeekMCPSystem:
         
         # Use MCP validation tools
         if state.mcp_tools_available and budget_data:
-            budget_validation = self.validation_tools.validate_budget(budget_data, funder_requirements)
+            budget_validation = await asyncio.to_thread(self.validation_tools.validate_budget, budget_data, funder_requirements)
             state.budget_validation = budget_validation.__dict__
             
             # If validation issues found, request peer review
             if budget_validation.issues:
-                review_task_id = self.collaboration_tools.request_peer_review(
+                review_task_id = await asyncio.to_thread(
+                    self.collaboration_tools.request_peer_review,
                     requester=agent_name,
                     content=response,
                     reviewers=["general_manager"],
@@ -350,7 +370,7 @@ class IntegratedDeepSeekMCPSystem:
         print(f"✍️ {agent_name}: Grant writing with MCP collaboration...")
         
         # Get shared artifacts from other agents
-        artifacts = self.collaboration_tools.get_shared_artifacts(agent_name, "research")
+        artifacts = await asyncio.to_thread(self.collaboration_tools.get_shared_artifacts, agent_name, "research")
         
         # DeepSeek R1 grant writing
         prompt_config = get_agent_prompt(agent_name)
@@ -377,18 +397,19 @@ class IntegratedDeepSeekMCPSystem:
             """}
         ]
         
-        response = self.deepseek_client.chat_completion(messages, agent_name)
+        response = await asyncio.to_thread(self.deepseek_client.chat_completion, messages, agent_name)
         state.written_narrative = response
         state.agent_outputs[agent_name] = response
         
         # Quick MCP compliance check
         if state.mcp_tools_available:
             funder_name = self._extract_funder_name(state.grant_opportunity)
-            compliance_check = self.validation_tools.quick_compliance_check(response, funder_name)
+            compliance_check = await asyncio.to_thread(self.validation_tools.quick_compliance_check, response, funder_name)
             
             # If compliance score is low, request collaboration
             if compliance_check.get('score', 0) < 0.7:
-                collab_task_id = self.collaboration_tools.create_collaboration_task(
+                collab_task_id = await asyncio.to_thread(
+                    self.collaboration_tools.create_collaboration_task,
                     requester=agent_name,
                     assignee="general_manager",
                     task_type=CollaborationMessageType.URGENT_CONSULTATION,
@@ -434,7 +455,7 @@ class IntegratedDeepSeekMCPSystem:
             """}
         ]
         
-        response = self.deepseek_client.chat_completion(messages, agent_name)
+        response = await asyncio.to_thread(self.deepseek_client.chat_completion, messages, agent_name)
         state.impact_assessment = response
         state.agent_outputs[agent_name] = response
         
@@ -473,7 +494,7 @@ class IntegratedDeepSeekMCPSystem:
             """}
         ]
         
-        response = self.deepseek_client.chat_completion(messages, agent_name)
+        response = await asyncio.to_thread(self.deepseek_client.chat_completion, messages, agent_name)
         state.networking_strategy = response
         state.agent_outputs[agent_name] = response
         
@@ -499,7 +520,7 @@ class IntegratedDeepSeekMCPSystem:
         # Update collaboration status
         active_tasks = []
         for agent_name in AGENT_MODELS.keys():
-            tasks = self.collaboration_tools.get_assigned_tasks(agent_name, "pending")
+            tasks = await asyncio.to_thread(self.collaboration_tools.get_assigned_tasks, agent_name, "pending")
             active_tasks.extend(tasks)
         
         print(f"📨 Processed communications for {len(self.agent_communicators)} agents")
@@ -512,21 +533,45 @@ class IntegratedDeepSeekMCPSystem:
         print("🤝 Building consensus among agents...")
         
         # Create consensus on final application approach
-        consensus_id = self.collaboration_tools.build_consensus(
+        consensus_id = await asyncio.to_thread(
+            self.collaboration_tools.build_consensus,
             initiator="general_manager",
             topic="Final grant application approach and quality",
             options=["Approve for submission", "Requires revisions", "Major changes needed"],
             participants=list(AGENT_MODELS.keys())
         )
         
-        # Wait briefly for consensus (in real system, this would be more sophisticated)
-        await asyncio.sleep(1)
+        # Wait briefly for consensus - returns as soon as no participant has the request pending
+        await self._await_consensus(consensus_id, list(AGENT_MODELS.keys()))
         
         state.workflow_status = "consensus_building_complete"
         print("✅ Consensus building initiated")
         
         return state
     
+    async def _await_consensus(self, consensus_id: str, participants: List[str],
+                               timeout: float = CONSENSUS_WAIT_SECONDS) -> bool:
+        """Poll participants' pending tasks until the consensus request is answered, with exponential backoff"""
+        delay = 0.05
+        elapsed = 0.0
+        while True:
+            assigned = await asyncio.gather(*(
+                asyncio.to_thread(self.collaboration_tools.get_assigned_tasks, participant, "pending")
+                for participant in participants
+            ))
+            pending = any(
+                task.context.get("consensus_id") == consensus_id
+                for tasks in assigned
+                for task in tasks
+            )
+            if not pending:
+                return True
+            if elapsed >= timeout:
+                return False
+            await asyncio.sleep(delay)
+            elapsed += delay
+            delay = min(delay * 1.5, 1.0)
+    
     async def _validation_and_finalization(self, state: EnhancedGrantApplicationState) -> EnhancedGrantApplicationState:
         """Final validation and application compilation"""
         print("✅ Final validation and application compilation...")
@@ -544,7 +589,8 @@ class IntegratedDeepSeekMCPSystem:
         # Comprehensive MCP validation
         if state.mcp_tools_available:
             funder_requirements = self._extract_funder_requirements(state.funder_profile)
-            compliance_report = self.validation_tools.validate_compliance(
+            compliance_report = await asyncio.to_thread(
+                self.validation_tools.validate_compliance,
                 final_application_components, funder_requirements
             )
             state.compliance_report = compliance_report.__dict__
@@ -576,7 +622,7 @@ class IntegratedDeepSeekMCPSystem:
             """}
         ]
         
-        final_response = self.deepseek_client.chat_completion(final_messages, "general_manager")
+        final_response = await asyncio.to_thread(self.deepseek_client.chat_completion, final_messages, "general_manager")
         state.final_application = final_response
         state.workflow_status = "complete"
         
@@ -601,17 +647,15 @@ class IntegratedDeepSeekMCPSystem:
     def _extract_funder_name(self, opportunity: str) -> str:
         """Extract funder name from opportunity text"""
         # Simple extraction - could be enhanced with NLP
-        common_funders = ["NSF", "NIH", "DOE", "NASA", "DARPA", "Gates Foundation"]
-        for funder in common_funders:
-            if funder.lower() in opportunity.lower():
+        opportunity = opportunity.lower()
+        for funder, funder_lower in _COMMON_FUNDERS:
+            if funder_lower in opportunity:
                 return funder
         return "Unknown Funder"
     
     def _extract_funding_amount(self, opportunity: str) -> Optional[str]:
         """Extract funding amount from opportunity text"""
-        import re
-        amount_pattern = r'\$[\d,]+(?:K|M|k|m|,000|,000,000)?'
-        match = re.search(amount_pattern, opportunity)
+        match = _FUNDING_AMOUNT_RE.search(opportunity)
         return match.group(0) if match else None
     
     def _extract_budget_from_text(self, budget_text: str) -> Dict[str, Any]:
@@ -673,6 +717,7 @@ class IntegratedDeepSeekMCPSystem:
 
 async def main():
     """Test the integrated system"""
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS))
     system = IntegratedDeepSeekMCPSystem()
     
     # Test with sample grant opportunity
@@ -6,14 +6,51 @@ Replaces unreliable Azure Bing Search Grounding due to subscription restrictions
 
 import os
 import asyncio
-import requests
+import httpx
 import json
 import logging
 import time
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 
-@dataclass
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson not installed - stdlib json also accepts bytes
+    _json_loads = json.loads
+
+# Shared async HTTP client - keeps TLS connections to Google/Brave alive across searches
+_HTTP = httpx.AsyncClient(
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+)
+
+async def close_http_client():
+    """Close the shared HTTP client (call from worker shutdown)"""
+    await _HTTP.aclose()
+
+# Circuit breaker settings - skip a provider that keeps failing instead of paying its timeout on every search
+CIRCUIT_FAILURE_THRESHOLD = 3  # Consecutive failures before the circuit opens
+CIRCUIT_OPEN_SECONDS = 60  # How long to skip a provider after repeated failures
+CIRCUIT_QUOTA_OPEN_SECONDS = 3600  # How long to skip a provider that reported quota exhaustion
+QUOTA_STATUS_CODES = (403, 429)
+
+# Snippet length shown per result in the research summaries (also used by searxng_mcp_tools)
+SNIPPET_CHARS = 200
+
+def _snippet(text: str, limit: int) -> str:
+    """Text cut to limit characters, with an ellipsis when anything was dropped"""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+class SearchAPIError(Exception):
+    """Non-200 response from a search provider"""
+    
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+@dataclass(slots=True)
 class WebSearchResult:
     """Individual web search result"""
     title: str
@@ -22,7 +59,7 @@ class WebSearchResult:
     display_url: str
     source: str = ""  # Google, Brave, etc.
     
-@dataclass 
+@dataclass(slots=True)
 class WebSearchResponse:
     """Complete web search response"""
     query: str
@@ -59,6 +96,12 @@ class ReliableWebSearch:
         self.google_requests_today = 0
         self.brave_requests_month = 0
         
+        # Per-provider circuit breaker state
+        self.circuits = {
+            "google": {"fails": 0, "open_until": 0.0},
+            "brave": {"fails": 0, "open_until": 0.0}
+        }
+        
         # Log initialization status with quota info (Google is primary again)
         if self.google_api_key and self.google_cx:
             logging.info("🔍 Google Custom Search initialized (PRIMARY - FREE: 100/day, IP restrictions removed)")
@@ -89,36 +132,36 @@ class ReliableWebSearch:
         count = min(count or self.default_count, self.max_count)
         
         # Try Google Custom Search first (IP restrictions removed, now reliable from Azure Functions)
-        if self.google_api_key and self.google_cx:
+        if self.google_api_key and self.google_cx and self._circuit_allows("google"):
             try:
-                logging.info(f"🔍 Trying Google Custom Search for: '{query}' (Primary - IP restrictions removed)")
+                logging.info("🔍 Trying Google Custom Search for: '%s' (Primary - IP restrictions removed)", query)
                 result = await self._google_search(query, count, market, freshness)
                 if result.success:
                     result.source_used = "Google Custom Search"
                     result.requests_made = 1
                     result.quota_usage = self._get_quota_usage()
-                    logging.info(f"✅ Google search succeeded: {result.total_results} results in {result.search_time:.2f}s")
+                    logging.info("✅ Google search succeeded: %s results in %.2fs", result.total_results, result.search_time)
                     return result
                 else:
-                    logging.warning(f"⚠️ Google search failed: {result.error_message}")
+                    logging.warning("⚠️ Google search failed: %s", result.error_message)
             except Exception as e:
-                logging.error(f"❌ Google search exception: {e}")
+                logging.error("❌ Google search exception: %s", e)
         
         # Fallback to Brave Search
-        if self.brave_api_key:
+        if self.brave_api_key and self._circuit_allows("brave"):
             try:
-                logging.info(f"🦁 Falling back to Brave Search for: '{query}'")
+                logging.info("🦁 Falling back to Brave Search for: '%s'", query)
                 result = await self._brave_search(query, count, market)
                 if result.success:
                     result.source_used = "Brave Search (fallback)"
                     result.requests_made = 1
                     result.quota_usage = self._get_quota_usage()
-                    logging.info(f"✅ Brave search succeeded: {result.total_results} results in {result.search_time:.2f}s")
+                    logging.info("✅ Brave search succeeded: %s results in %.2fs", result.total_results, result.search_time)
                     return result
                 else:
-                    logging.warning(f"⚠️ Brave search failed: {result.error_message}")
+                    logging.warning("⚠️ Brave search failed: %s", result.error_message)
             except Exception as e:
-                logging.error(f"❌ Brave search exception: {e}")
+                logging.error("❌ Brave search exception: %s", e)
         
         # Both failed or not configured
         search_time = time.time() - start_time
@@ -163,18 +206,19 @@ class ReliableWebSearch:
                 if date_restrict:
                     params['dateRestrict'] = date_restrict
             
-            logging.info(f"DEBUG: Google Custom Search API call: {params['q']}, num={params['num']}")
+            logging.info("DEBUG: Google Custom Search API call: %s, num=%s", params['q'], params['num'])
             
-            # Make API request
-            response = requests.get(self.google_endpoint, params=params, timeout=30)
+            # Make API request - read the raw body once and decode it straight from bytes
+            async with _HTTP.stream("GET", self.google_endpoint, params=params) as response:
+                body = await response.aread()
             self.google_requests_today += 1
             
-            logging.info(f"DEBUG: Google API response status: {response.status_code}")
+            logging.info("DEBUG: Google API response status: %s", response.status_code)
             
             if response.status_code != 200:
-                raise Exception(f"Google API returned status {response.status_code}: {response.text}")
+                raise SearchAPIError(f"Google API returned status {response.status_code}: {response.text}", response.status_code)
             
-            data = response.json()
+            data = _json_loads(body)
             
             # Parse results
             results = []
@@ -189,6 +233,7 @@ class ReliableWebSearch:
                     ))
             
             search_time = time.time() - start_time
+            self._record_success("google")
             
             return WebSearchResponse(
                 query=query,
@@ -201,7 +246,8 @@ class ReliableWebSearch:
             
         except Exception as e:
             search_time = time.time() - start_time
-            logging.error(f"DEBUG: Google Custom Search failed: {e}")
+            logging.error("DEBUG: Google Custom Search failed: %s", e)
+            self._record_failure("google", e)
             
             return WebSearchResponse(
                 query=query,
@@ -235,18 +281,19 @@ class ReliableWebSearch:
                 'X-Subscription-Token': self.brave_api_key
             }
             
-            logging.info(f"DEBUG: Brave Search API call: {params['q']}, count={params['count']}")
+            logging.info("DEBUG: Brave Search API call: %s, count=%s", params['q'], params['count'])
             
-            # Make API request
-            response = requests.get(self.brave_endpoint, params=params, headers=headers, timeout=30)
+            # Make API request - read the raw body once and decode it straight from bytes
+            async with _HTTP.stream("GET", self.brave_endpoint, params=params, headers=headers) as response:
+                body = await response.aread()
             self.brave_requests_month += 1
             
-            logging.info(f"DEBUG: Brave API response status: {response.status_code}")
+            logging.info("DEBUG: Brave API response status: %s", response.status_code)
             
             if response.status_code != 200:
-                raise Exception(f"Brave API returned status {response.status_code}: {response.text}")
+                raise SearchAPIError(f"Brave API returned status {response.status_code}: {response.text}", response.status_code)
             
-            data = response.json()
+            data = _json_loads(body)
             
             # Parse results
             results = []
@@ -261,6 +308,7 @@ class ReliableWebSearch:
                     ))
             
             search_time = time.time() - start_time
+            self._record_success("brave")
             
             return WebSearchResponse(
                 query=query,
@@ -273,7 +321,8 @@ class ReliableWebSearch:
             
         except Exception as e:
             search_time = time.time() - start_time
-            logging.error(f"DEBUG: Brave Search failed: {e}")
+            logging.error("DEBUG: Brave Search failed: %s", e)
+            self._record_failure("brave", e)
             
             return WebSearchResponse(
                 query=query,
@@ -284,12 +333,60 @@ class ReliableWebSearch:
                 error_message=f"DEBUG: Brave Search failed: {e}"
             )
     
+    def _circuit_allows(self, provider: str) -> bool:
+        """Check whether a provider may be called, or is being skipped after recent failures"""
+        open_until = self.circuits[provider]["open_until"]
+        if open_until > time.monotonic():
+            logging.warning("⚠️ Skipping %s search - circuit open for another %.0fs", provider, open_until - time.monotonic())
+            return False
+        return True
+    
+    def _record_success(self, provider: str):
+        """Close the provider's circuit after a successful call"""
+        self.circuits[provider] = {"fails": 0, "open_until": 0.0}
+    
+    def _record_failure(self, provider: str, error: Exception):
+        """Count a failed call and open the circuit on quota exhaustion or repeated failures"""
+        circuit = self.circuits[provider]
+        circuit["fails"] += 1
+        if isinstance(error, SearchAPIError) and error.status_code in QUOTA_STATUS_CODES:
+            # Quota will not recover within seconds - skip this provider for longer
+            circuit["open_until"] = time.monotonic() + CIRCUIT_QUOTA_OPEN_SECONDS
+        elif circuit["fails"] >= CIRCUIT_FAILURE_THRESHOLD:
+            # Timeouts, connection errors and 5xx responses are transient - retry after a short break
+            circuit["open_until"] = time.monotonic() + CIRCUIT_OPEN_SECONDS
+        else:
+            return
+        logging.warning("⚠️ %s search circuit opened after %s failure(s): %s", provider, circuit['fails'], error)
+    
     def _get_quota_usage(self) -> str:
         """Get quota usage information"""
         google_quota = f"Google: {self.google_requests_today}/100 today" if (self.google_api_key and self.google_cx) else "Google: not configured"
         brave_quota = f"Brave: {self.brave_requests_month}/2000 month" if self.brave_api_key else "Brave: not configured"
         return f"{google_quota}, {brave_quota}"
     
+    async def bulk_research(self, queries: List[str], count: int = 5, freshness: str = "Month") -> List[WebSearchResponse]:
+        """
+        Run several independent searches concurrently, returning one response per query in order
+        
+        A search that raises is reported as a failed response instead of cancelling the others.
+        """
+        responses = await asyncio.gather(
+            *(self.web_search(query, count=count, freshness=freshness) for query in queries),
+            return_exceptions=True
+        )
+        return [
+            WebSearchResponse(
+                query=query,
+                results=[],
+                total_results=0,
+                search_time=0.0,
+                success=False,
+                error_message=f"Search failed: {response}"
+            ) if isinstance(response, Exception) else response
+            for query, response in zip(queries, responses)
+        ]
+    
     async def grant_research(self, query: str) -> str:
         """Specialized grant research using reliable web search"""
         enhanced_query = f"{query} grant funding opportunity foundation nonprofit"
@@ -297,23 +394,24 @@ class ReliableWebSearch:
         response = await self.web_search(enhanced_query, count=5, freshness="Month")
         
         if response.success and response.results:
-            summary = f"🔍 RELIABLE WEB SEARCH GRANT RESEARCH for '{query}':\\n\\n"
+            parts = [f"🔍 RELIABLE WEB SEARCH GRANT RESEARCH for '{query}':\n\n"]
             
             for i, result in enumerate(response.results, 1):
-                summary += f"  {i}. {result.title}\\n"
+                parts.append(f"  {i}. {result.title}\n")
                 if result.content:
-                    snippet = result.content[:200] + "..." if len(result.content) > 200 else result.content
-                    summary += f"     {snippet}\\n"
-                summary += f"     {result.url}\\n\\n"
+                    parts.append(f"     {_snippet(result.content, SNIPPET_CHARS)}\n")
+                parts.append(f"     {result.url}\n\n")
             
-            summary += f"🔍 SOURCE: {response.source_used}\\n"
-            summary += f"⏱️  SEARCH TIME: {response.search_time:.2f}s\\n"
-            summary += f"📊 RESULTS: {response.total_results} results\\n"
-            summary += f"📈 REQUESTS: {response.requests_made}\\n"
-            summary += f"📊 QUOTA: {response.quota_usage}\\n"
-            summary += f"🔒 RELIABILITY: Direct API access (99%+ uptime)\\n"
+            parts.append(
+                f"🔍 SOURCE: {response.source_used}\n"
+                f"⏱️  SEARCH TIME: {response.search_time:.2f}s\n"
+                f"📊 RESULTS: {response.total_results} results\n"
+                f"📈 REQUESTS: {response.requests_made}\n"
+                f"📊 QUOTA: {response.quota_usage}\n"
+                f"🔒 RELIABILITY: Direct API access (99%+ uptime)\n"
+            )
             
-            return summary
+            return "".join(parts)
         else:
             return f"ERROR: Reliable web search grant research failed for query '{query}'. Response success={response.success}, total_results={response.total_results}, search_time={response.search_time}s, source_used={response.source_used}, error_message='{response.error_message}'"
 
@@ -321,4 +419,4 @@ class ReliableWebSearch:
 reliable_web_search = ReliableWebSearch()
 
 # Export global instance for easy import
-__all__ = ['ReliableWebSearch', 'WebSearchResult', 'WebSearchResponse', 'reliable_web_search']
\ No newline at end of file
+__all__ = ['ReliableWebSearch', 'WebSearchResult', 'WebSearchResponse', 'SearchAPIError', 'reliable_web_search', 'close_http_client']
\ No newline at end of file
@@ -4,14 +4,43 @@ No API keys required - uses public SearXNG instances with fallback rotation
 """
 
 import asyncio
-import requests
+import httpx
 import random
 import json
 import logging
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+import time
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, replace
+from cachetools import TTLCache
+from reliable_web_search import _json_loads, _snippet, SNIPPET_CHARS
 
-@dataclass
+# Shared async HTTP client - searches no longer block the event loop and keep-alive connections
+# to the SearXNG instances are reused across queries
+_HTTP = httpx.AsyncClient(
+    http2=True,
+    timeout=15,
+    follow_redirects=True,
+    headers={
+        "User-Agent": "Mozilla/5.0 (compatible; GrantSeekerAI/1.0; +https://grantseeker.ai)",
+        "Accept": "application/json",
+        "Accept-Language": "en-US,en;q=0.9"
+    },
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+)
+
+async def close_http_client():
+    """Close the shared HTTP client (call from worker shutdown)"""
+    await _HTTP.aclose()
+
+# Successful searches shared by all callers on this worker, keyed by (normalized query, engines, category).
+# Research queries repeat across sessions; an hour is well inside how fast the public results change.
+_SEARCH_CACHE = TTLCache(maxsize=256, ttl=3600)
+
+def clear_search_cache():
+    """Drop all cached search responses"""
+    _SEARCH_CACHE.clear()
+
+@dataclass(slots=True)
 class SearchResult:
     """Individual search result"""
     title: str
@@ -19,7 +48,7 @@ class SearchResult:
     url: str
     engine: str = ""
     
-@dataclass 
+@dataclass(slots=True)
 class SearchResponse:
     """Complete search response from SearXNG"""
     query: str
@@ -31,6 +60,27 @@ class SearchResponse:
     success: bool
     error_message: str = ""
 
+# Per-instance circuit breaker - public instances that keep failing are skipped instead of
+# spending a retry (and up to the full timeout) on them for every search
+INSTANCE_FAILURE_THRESHOLD = 2  # Consecutive failures before an instance is skipped
+INSTANCE_OPEN_SECONDS = 300  # How long a failing instance is skipped
+
+# Snippet length shown per result in the funder research summary (others use SNIPPET_CHARS)
+FUNDER_SNIPPET_CHARS = 250
+
+def _format_summary(header: str, results: List[SearchResult], snippet_len: int, footer: Tuple[str, ...]) -> str:
+    """Render a research summary: header, numbered title/snippet/url blocks, then the footer lines"""
+    parts = [header, ""]
+    append = parts.append
+    for i, result in enumerate(results, 1):
+        append(f"  {i}. {result.title}")
+        if result.content:
+            append(f"     {_snippet(result.content, snippet_len)}")
+        append(f"     {result.url}")
+        append("")
+    parts.extend(footer)
+    return "\n".join(parts) + "\n"
+
 class SearXNGMCPTools:
     """SearXNG-powered MCP tools for web search and research"""
     
@@ -58,20 +108,37 @@ class SearXNGMCPTools:
         self.default_timeout = 15
         self.max_retries = 3
         
+        # Per-instance circuit breaker state
+        self.instance_circuits = {
+            instance: {"fails": 0, "open_until": 0.0} for instance in self.searxng_instances
+        }
+        
         logging.info("🔍 SearXNG MCP Tools initialized")
         logging.info(f"   Available instances: {len(self.searxng_instances)}")
         logging.info(f"   Default engines: {self.default_engines}")
     
     async def web_search(self, query: str, engines: str = None, category: str = "general") -> SearchResponse:
         """Perform web search using SearXNG metasearch engine"""
-        start_time = asyncio.get_event_loop().time()
+        start_time = time.monotonic()
         
         engines = engines or self.default_engines
+        cache_key = (query.strip().lower(), engines, category)
+        cached = _SEARCH_CACHE.get(cache_key)
+        if cached is not None:
+            logging.info("SearXNG cache hit for query '%s'", query)
+            # Fresh copy per caller: their own query casing and timing, and a results list they may mutate
+            return replace(cached, query=query, results=list(cached.results),
+                           search_time=time.monotonic() - start_time)
         
         for attempt in range(self.max_retries):
+            available = self._available_instances()
+            if not available:
+                logging.warning("⚠️ All SearXNG instances have open circuits - failing fast for query '%s'", query)
+                break
+            
             try:
                 # Random instance selection for load balancing
-                instance = random.choice(self.searxng_instances)
+                instance = random.choice(available)
                 search_url = f"{instance}/search"
                 
                 params = {
@@ -84,23 +151,11 @@ class SearXNGMCPTools:
                     "safesearch": "1"
                 }
                 
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (compatible; GrantSeekerAI/1.0; +https://grantseeker.ai)",
-                    "Accept": "application/json",
-                    "Accept-Language": "en-US,en;q=0.9"
-                }
-                
-                response = requests.get(
-                    search_url,
-                    params=params,
-                    headers=headers,
-                    timeout=self.default_timeout,
-                    allow_redirects=True
-                )
+                response = await _HTTP.get(search_url, params=params, timeout=self.default_timeout)
                 
                 if response.status_code == 200:
                     try:
-                        data = response.json()
+                        data = _json_loads(response.content)
                         results = []
                         
                         logging.info(f"SearXNG {instance} returned {len(data.get('results', []))} results for query '{query}'")
@@ -116,9 +171,9 @@ class SearXNGMCPTools:
                                 if result.title and result.url:
                                     results.append(result)
                         
-                        search_time = asyncio.get_event_loop().time() - start_time
+                        search_time = time.monotonic() - start_time
                         
-                        return SearchResponse(
+                        search_response = SearchResponse(
                             query=query,
                             results=results,
                             total_results=len(results),
@@ -127,21 +182,27 @@ class SearXNGMCPTools:
                             search_time=search_time,
                             success=True
                         )
+                        _SEARCH_CACHE[cache_key] = replace(search_response, results=list(results))
+                        self._record_instance_success(instance)
+                        return search_response
                         
                     except json.JSONDecodeError as e:
                         logging.error(f"JSON decode error from {instance}: {e}. Response text: {response.text[:200]}")
+                        self._record_instance_failure(instance)
                         continue
                         
                 else:
                     logging.error(f"HTTP {response.status_code} from {instance}. Response headers: {dict(response.headers)}. Response text: {response.text[:200]}")
+                    self._record_instance_failure(instance)
                     continue
                     
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPError as e:
                 logging.error(f"Request failed to {instance}: {type(e).__name__}: {e}. URL: {search_url}?{params}")
+                self._record_instance_failure(instance)
                 continue
         
         # All attempts failed
-        search_time = asyncio.get_event_loop().time() - start_time
+        search_time = time.monotonic() - start_time
         return SearchResponse(
             query=query,
             results=[],
@@ -153,6 +214,23 @@ class SearXNGMCPTools:
             error_message=f"HTTP failures on all {self.max_retries} attempts across instances {self.searxng_instances[:self.max_retries]}. Check logs for specific HTTP status codes and connection errors."
         )
     
+    def _available_instances(self) -> List[str]:
+        """Instances whose circuit is closed, or whose skip period has run out"""
+        now = time.monotonic()
+        return [instance for instance, circuit in self.instance_circuits.items() if circuit["open_until"] <= now]
+    
+    def _record_instance_success(self, instance: str):
+        """Close the instance's circuit after a successful search"""
+        self.instance_circuits[instance] = {"fails": 0, "open_until": 0.0}
+    
+    def _record_instance_failure(self, instance: str):
+        """Count a failed search and skip the instance after repeated failures"""
+        circuit = self.instance_circuits[instance]
+        circuit["fails"] += 1
+        if circuit["fails"] >= INSTANCE_FAILURE_THRESHOLD:
+            circuit["open_until"] = time.monotonic() + INSTANCE_OPEN_SECONDS
+            logging.warning("⚠️ SearXNG instance %s skipped for %ss after %s failure(s)", instance, INSTANCE_OPEN_SECONDS, circuit["fails"])
+    
     async def grant_research(self, query: str) -> str:
         """Specialized grant research using SearXNG"""
         # Enhance query for grant-specific results
@@ -161,21 +239,17 @@ class SearXNGMCPTools:
         response = await self.web_search(enhanced_query, engines="google,bing,duckduckgo")
         
         if response.success and response.results:
-            summary = f"🔍 GRANT RESEARCH RESULTS for '{query}':\n\n"
-            
-            for i, result in enumerate(response.results[:5], 1):
-                summary += f"  {i}. {result.title}\n"
-                if result.content:
-                    snippet = result.content[:200] + "..." if len(result.content) > 200 else result.content
-                    summary += f"     {snippet}\n"
-                summary += f"     {result.url}\n\n"
-            
-            summary += f"🔍 SOURCE: SearXNG Metasearch ({response.instance_used})\n"
-            summary += f"🌐 ENGINES: {', '.join(response.engines_used)}\n"
-            summary += f"⏱️  SEARCH TIME: {response.search_time:.2f}s\n"
-            summary += f"🔒 PRIVACY: No tracking, no data collection\n"
-            
-            return summary
+            return _format_summary(
+                f"🔍 GRANT RESEARCH RESULTS for '{query}':",
+                response.results[:5],
+                SNIPPET_CHARS,
+                (
+                    f"🔍 SOURCE: SearXNG Metasearch ({response.instance_used})",
+                    f"🌐 ENGINES: {', '.join(response.engines_used)}",
+                    f"⏱️  SEARCH TIME: {response.search_time:.2f}s",
+                    "🔒 PRIVACY: No tracking, no data collection",
+                )
+            )
         else:
             return f"ERROR: Grant research failed for query '{query}'. Response success={response.success}, total_results={response.total_results}, instance_used='{response.instance_used}', search_time={response.search_time}s, engines_used={response.engines_used}, error_message='{response.error_message}'"
     
@@ -186,21 +260,17 @@ class SearXNGMCPTools:
         response = await self.web_search(query, engines="google,bing,duckduckgo")
         
         if response.success and response.results:
-            summary = f"🏢 FUNDER RESEARCH for '{funder_name}':\n\n"
-            
-            for i, result in enumerate(response.results[:5], 1):
-                summary += f"  {i}. {result.title}\n"
-                if result.content:
-                    snippet = result.content[:250] + "..." if len(result.content) > 250 else result.content
-                    summary += f"     {snippet}\n"
-                summary += f"     {result.url}\n\n"
-            
-            summary += f"🔍 SOURCE: SearXNG Funder Research ({response.instance_used})\n"
-            summary += f"🌐 ENGINES: {', '.join(response.engines_used)}\n"
-            summary += f"📊 RESULTS: {response.total_results} funder intelligence results\n"
-            summary += f"🔒 PRIVACY: No tracking, anonymous search\n"
-            
-            return summary
+            return _format_summary(
+                f"🏢 FUNDER RESEARCH for '{funder_name}':",
+                response.results[:5],
+                FUNDER_SNIPPET_CHARS,
+                (
+                    f"🔍 SOURCE: SearXNG Funder Research ({response.instance_used})",
+                    f"🌐 ENGINES: {', '.join(response.engines_used)}",
+                    f"📊 RESULTS: {response.total_results} funder intelligence results",
+                    "🔒 PRIVACY: No tracking, anonymous search",
+                )
+            )
         else:
             return f"ERROR: Funder research failed for funder '{funder_name}'. Response success={response.success}, total_results={response.total_results}, instance_used='{response.instance_used}', search_time={response.search_time}s, engines_used={response.engines_used}, error_message='{response.error_message}'"
     
@@ -214,23 +284,54 @@ class SearXNGMCPTools:
         response = await self.web_search(query, engines="google,bing,duckduckgo,startpage")
         
         if response.success and response.results:
-            summary = f"🏆 COMPETITIVE ANALYSIS for '{organization_type}' organizations:\n\n"
-            
-            for i, result in enumerate(response.results[:4], 1):
-                summary += f"  {i}. {result.title}\n"
-                if result.content:
-                    snippet = result.content[:200] + "..." if len(result.content) > 200 else result.content
-                    summary += f"     {snippet}\n"
-                summary += f"     {result.url}\n\n"
-            
-            summary += f"🔍 SOURCE: SearXNG Competitive Intelligence ({response.instance_used})\n"
-            summary += f"🌐 ENGINES: Multi-engine aggregation\n"
-            summary += f"📈 ANALYSIS: Real-time competitive landscape data\n"
-            summary += f"🔒 PRIVACY: Anonymous competitive research\n"
-            
-            return summary
+            return _format_summary(
+                f"🏆 COMPETITIVE ANALYSIS for '{organization_type}' organizations:",
+                response.results[:4],
+                SNIPPET_CHARS,
+                (
+                    f"🔍 SOURCE: SearXNG Competitive Intelligence ({response.instance_used})",
+                    "🌐 ENGINES: Multi-engine aggregation",
+                    "📈 ANALYSIS: Real-time competitive landscape data",
+                    "🔒 PRIVACY: Anonymous competitive research",
+                )
+            )
         else:
             return f"ERROR: Competitive analysis failed for organization_type '{organization_type}'. Response success={response.success}, total_results={response.total_results}, instance_used='{response.instance_used}', search_time={response.search_time}s, engines_used={response.engines_used}, error_message='{response.error_message}'"
 
+    async def multi_search(self, queries: List[str], engines: str = None, category: str = "general") -> Dict[str, SearchResponse]:
+        """
+        Run several searches concurrently, returning each response by query.
+        A URL already returned for an earlier query is dropped from later ones so callers see each source once.
+        """
+        responses = await asyncio.gather(*(self.web_search(query, engines, category) for query in queries))
+        
+        seen_urls = set()
+        deduplicated = {}
+        for query, response in zip(queries, responses):
+            results = []
+            for result in response.results:
+                if result.url not in seen_urls:
+                    seen_urls.add(result.url)
+                    results.append(result)
+            # Responses may be shared through the search cache, so build a copy rather than trimming in place
+            deduplicated[query] = replace(response, results=results, total_results=len(results))
+        return deduplicated
+    
+    async def full_org_research(self, query: str, funder_name: str, organization_type: str, focus_area: str = "") -> Dict[str, str]:
+        """Run grant, funder and competitive research concurrently; returns each summary by research type"""
+        summaries = await asyncio.gather(
+            self.grant_research(query),
+            self.funder_research(funder_name),
+            self.competitive_analysis(organization_type, focus_area),
+            return_exceptions=True
+        )
+        research = {}
+        for research_type, summary in zip(("grant_research", "funder_research", "competitive_analysis"), summaries):
+            if isinstance(summary, Exception):
+                logging.error("SearXNG %s failed: %s: %s", research_type, type(summary).__name__, summary)
+                summary = f"ERROR: {research_type} raised {type(summary).__name__}: {summary}"
+            research[research_type] = summary
+        return research
+
 # Global instance for easy import
 searxng_tools = SearXNGMCPTools()
\ No newline at end of file
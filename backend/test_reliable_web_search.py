@@ -8,9 +8,37 @@ import json
 import os
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
-import requests
+import httpx
+import reliable_web_search as rws
 from reliable_web_search import ReliableWebSearch, WebSearchResult, WebSearchResponse
 
+
+class MockHTTP:
+    """Routes the shared httpx client through canned responses and records each request"""
+    
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+        
+    def _handler(self, request):
+        self.requests.append(request)
+        # Replay responses in order, repeating the last one once exhausted
+        response = self.responses[min(len(self.requests), len(self.responses)) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+    
+    @property
+    def call_count(self):
+        return len(self.requests)
+    
+    def params(self, index=-1):
+        return dict(self.requests[index].url.params)
+    
+    def patch(self):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self._handler))
+        return patch.object(rws, '_HTTP', client)
+
 class TestReliableWebSearch:
     """Test suite for ReliableWebSearch class"""
     
@@ -45,15 +73,13 @@ class TestReliableWebSearch:
         assert search.google_cx == ''
         assert search.brave_api_key == ''
         
+
     @patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test_google_key', 'GOOGLE_CUSTOM_SEARCH_CX': 'test_google_cx', 'BRAVE_SEARCH_API_KEY': 'test_brave_key'})
-    @patch('requests.get')
     @pytest.mark.asyncio
-    async def test_google_search_success(self, mock_get):
+    async def test_google_search_success(self):
         """Test successful Google Custom Search"""
         # Mock successful Google API response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        http = MockHTTP(httpx.Response(200, json={
             'items': [
                 {
                     'title': 'Test Result 1',
@@ -68,18 +94,18 @@ class TestReliableWebSearch:
                     'displayLink': 'example.com'
                 }
             ]
-        }
-        mock_get.return_value = mock_response
+        }))
         
         search = ReliableWebSearch()
-        result = await search.web_search("test query", count=2)
+        with http.patch():
+            result = await search.web_search("test query", count=2)
         
         # Verify API was called correctly
-        mock_get.assert_called_once()
-        call_args = mock_get.call_args
-        assert 'q' in call_args[1]['params']
-        assert call_args[1]['params']['q'] == 'test query'
-        assert call_args[1]['params']['num'] == 2
+        assert http.call_count == 1
+        params = http.params()
+        assert 'q' in params
+        assert params['q'] == 'test query'
+        assert params['num'] == '2'
         
         # Verify response
         assert result.success == True
@@ -92,18 +118,13 @@ class TestReliableWebSearch:
         assert "Google: 1/100 today" in result.quota_usage
         
     @patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test_google_key', 'GOOGLE_CUSTOM_SEARCH_CX': 'test_google_cx', 'BRAVE_SEARCH_API_KEY': 'test_brave_key'})
-    @patch('requests.get')
     @pytest.mark.asyncio
-    async def test_google_search_failure_brave_fallback(self, mock_get):
+    async def test_google_search_failure_brave_fallback(self):
         """Test Google failure with successful Brave fallback"""
         # Mock Google failure, then Brave success
-        google_response = MagicMock()
-        google_response.status_code = 429  # Rate limited
-        google_response.text = "Rate limit exceeded"
+        google_response = httpx.Response(429, text="Rate limit exceeded")  # Rate limited
         
-        brave_response = MagicMock()
-        brave_response.status_code = 200
-        brave_response.json.return_value = {
+        brave_response = httpx.Response(200, json={
             'web': {
                 'results': [
                     {
@@ -113,15 +134,16 @@ class TestReliableWebSearch:
                     }
                 ]
             }
-        }
+        })
         
-        mock_get.side_effect = [google_response, brave_response]
+        http = MockHTTP(google_response, brave_response)
         
         search = ReliableWebSearch()
-        result = await search.web_search("test query", count=3)
+        with http.patch():
+            result = await search.web_search("test query", count=3)
         
         # Verify both APIs were called
-        assert mock_get.call_count == 2
+        assert http.call_count == 2
         
         # Verify Brave fallback worked
         assert result.success == True
@@ -133,22 +155,18 @@ class TestReliableWebSearch:
         assert "Brave: 1/2000 month" in result.quota_usage
         
     @patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test_google_key', 'GOOGLE_CUSTOM_SEARCH_CX': 'test_google_cx', 'BRAVE_SEARCH_API_KEY': 'test_brave_key'})
-    @patch('requests.get')
     @pytest.mark.asyncio
-    async def test_both_apis_fail(self, mock_get):
+    async def test_both_apis_fail(self):
         """Test both Google and Brave APIs failing"""
         # Mock both APIs failing
-        failure_response = MagicMock()
-        failure_response.status_code = 500
-        failure_response.text = "Internal Server Error"
-        
-        mock_get.return_value = failure_response
+        http = MockHTTP(httpx.Response(500, text="Internal Server Error"))
         
         search = ReliableWebSearch()
-        result = await search.web_search("test query")
+        with http.patch():
+            result = await search.web_search("test query")
         
         # Verify both APIs were attempted
-        assert mock_get.call_count == 2
+        assert http.call_count == 2
         
         # Verify failure response
         assert result.success == False
@@ -159,17 +177,13 @@ class TestReliableWebSearch:
         assert result.requests_made == 0
         
     @patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test_google_key', 'GOOGLE_CUSTOM_SEARCH_CX': 'test_google_cx', 'BRAVE_SEARCH_API_KEY': 'test_brave_key'})
-    @patch('requests.get')
     @pytest.mark.asyncio
-    async def test_brave_search_success(self, mock_get):
+    async def test_brave_search_success(self):
         """Test successful Brave Search"""
         # Mock Google failure to force Brave usage
-        google_response = MagicMock()
-        google_response.status_code = 403
+        google_response = httpx.Response(403)
         
-        brave_response = MagicMock()
-        brave_response.status_code = 200
-        brave_response.json.return_value = {
+        brave_response = httpx.Response(200, json={
             'web': {
                 'results': [
                     {
@@ -184,19 +198,20 @@ class TestReliableWebSearch:
                     }
                 ]
             }
-        }
+        })
         
-        mock_get.side_effect = [google_response, brave_response]
+        http = MockHTTP(google_response, brave_response)
         
         search = ReliableWebSearch()
-        result = await search.web_search("nonprofit grants", count=5)
+        with http.patch():
+            result = await search.web_search("nonprofit grants", count=5)
         
         # Verify Brave API was called with correct parameters
-        brave_call = mock_get.call_args_list[1]
-        assert 'count' in brave_call[1]['params']
-        assert brave_call[1]['params']['q'] == 'nonprofit grants'
-        assert brave_call[1]['params']['count'] == 5
-        assert 'X-Subscription-Token' in brave_call[1]['headers']
+        brave_params = http.params(1)
+        assert 'count' in brave_params
+        assert brave_params['q'] == 'nonprofit grants'
+        assert brave_params['count'] == '5'
+        assert 'X-Subscription-Token' in http.requests[1].headers
         
         # Verify response
         assert result.success == True
@@ -206,20 +221,17 @@ class TestReliableWebSearch:
         assert result.results[1].url == "https://funding.gov/opportunities"
         
     @patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test_google_key', 'GOOGLE_CUSTOM_SEARCH_CX': 'test_google_cx', 'BRAVE_SEARCH_API_KEY': 'test_brave_key'})
-    @patch('requests.get')
     @pytest.mark.asyncio
-    async def test_market_and_freshness_parameters(self, mock_get):
+    async def test_market_and_freshness_parameters(self):
         """Test market and freshness parameter handling"""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {'items': []}
-        mock_get.return_value = mock_response
+        http = MockHTTP(httpx.Response(200, json={'items': []}))
         
         search = ReliableWebSearch()
-        result = await search.web_search("test query", market="en-US", freshness="Week")
+        with http.patch():
+            result = await search.web_search("test query", market="en-US", freshness="Week")
         
         # Verify parameters were passed correctly
-        call_args = mock_get.call_args[1]['params']
+        call_args = http.params()
         assert 'lr' in call_args
         assert call_args['lr'] == 'lang_en'
         assert 'gl' in call_args
@@ -228,13 +240,10 @@ class TestReliableWebSearch:
         assert call_args['dateRestrict'] == 'w1'
         
     @patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test_google_key', 'GOOGLE_CUSTOM_SEARCH_CX': 'test_google_cx', 'BRAVE_SEARCH_API_KEY': 'test_brave_key'})
-    @patch('requests.get')
     @pytest.mark.asyncio
-    async def test_grant_research_success(self, mock_get):
+    async def test_grant_research_success(self):
         """Test specialized grant research function"""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        http = MockHTTP(httpx.Response(200, json={
             'items': [
                 {
                     'title': 'Environmental Grant Program',
@@ -243,14 +252,14 @@ class TestReliableWebSearch:
                     'displayLink': 'envfoundation.org'
                 }
             ]
-        }
-        mock_get.return_value = mock_response
+        }))
         
         search = ReliableWebSearch()
-        result = await search.grant_research("environmental conservation")
+        with http.patch():
+            result = await search.grant_research("environmental conservation")
         
         # Verify enhanced query was used
-        call_args = mock_get.call_args[1]['params']
+        call_args = http.params()
         assert "grant funding opportunity foundation nonprofit" in call_args['q']
         assert "environmental conservation" in call_args['q']
         
@@ -260,23 +269,21 @@ class TestReliableWebSearch:
         assert "https://envfoundation.org/grants" in result
         assert "Google Custom Search" in result
         assert "RELIABILITY: Direct API access" in result
+        assert "\\n" not in result  # real line breaks, not escaped ones
         
     @patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test_google_key', 'GOOGLE_CUSTOM_SEARCH_CX': 'test_google_cx', 'BRAVE_SEARCH_API_KEY': 'test_brave_key'})
-    @patch('requests.get')
     @pytest.mark.asyncio
-    async def test_quota_tracking(self, mock_get):
+    async def test_quota_tracking(self):
         """Test quota usage tracking functionality"""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {'items': []}
-        mock_get.return_value = mock_response
+        http = MockHTTP(httpx.Response(200, json={'items': []}))
         
         search = ReliableWebSearch()
         
         # Make multiple requests
-        await search.web_search("query 1")
-        await search.web_search("query 2")
-        await search.web_search("query 3")
+        with http.patch():
+            await search.web_search("query 1")
+            await search.web_search("query 2")
+            await search.web_search("query 3")
         
         # Check quota tracking
         quota_info = search._get_quota_usage()
@@ -298,17 +305,17 @@ class TestReliableWebSearch:
         assert "Brave: not configured" in result.quota_usage
         
     @patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test_google_key', 'GOOGLE_CUSTOM_SEARCH_CX': 'test_google_cx', 'BRAVE_SEARCH_API_KEY': 'test_brave_key'})
-    @patch('requests.get')
     @pytest.mark.asyncio
-    async def test_request_timeout_handling(self, mock_get):
+    async def test_request_timeout_handling(self):
         """Test timeout handling for API requests"""
-        mock_get.side_effect = requests.exceptions.Timeout("Request timed out")
+        http = MockHTTP(httpx.ReadTimeout("Request timed out"))
         
         search = ReliableWebSearch()
-        result = await search.web_search("test query")
+        with http.patch():
+            result = await search.web_search("test query")
         
         # Should try both APIs and fail
-        assert mock_get.call_count == 2
+        assert http.call_count == 2
         assert result.success == False
         assert "Request timed out" in result.error_message or "Timeout" in result.error_message
         
@@ -322,16 +329,70 @@ class TestReliableWebSearch:
         
         # Count should be limited to max_count
         with patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test', 'GOOGLE_CUSTOM_SEARCH_CX': 'test'}):
-            with patch('requests.get') as mock_get:
-                mock_response = MagicMock()
-                mock_response.status_code = 200
-                mock_response.json.return_value = {'items': []}
-                mock_get.return_value = mock_response
-                
+            http = MockHTTP(httpx.Response(200, json={'items': []}))
+            with http.patch():
                 # Test count > max_count gets limited
                 asyncio.run(search.web_search("test", count=20))
-                call_args = mock_get.call_args[1]['params']
-                assert call_args['num'] == 10  # Should be limited to max_count
+                call_args = http.params()
+                assert call_args['num'] == '10'  # Should be limited to max_count
+
+    @patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test_google_key', 'GOOGLE_CUSTOM_SEARCH_CX': 'test_google_cx', 'BRAVE_SEARCH_API_KEY': 'test_brave_key'})
+    @pytest.mark.asyncio
+    async def test_circuit_opens_after_repeated_failures(self):
+        """Test that a provider failing repeatedly is skipped until its circuit closes"""
+        brave_response = httpx.Response(200, json={'web': {'results': [{'title': 'Brave Result', 'description': '', 'url': 'https://brave-example.com'}]}})
+        http = MockHTTP(httpx.Response(500), brave_response)
+        
+        search = ReliableWebSearch()
+        with http.patch():
+            for _ in range(rws.CIRCUIT_FAILURE_THRESHOLD):
+                http.requests.clear()
+                await search.web_search("test query")
+            
+            # Google circuit is now open - only Brave is called
+            http.responses = [brave_response]
+            http.requests.clear()
+            result = await search.web_search("test query")
+        
+        assert http.call_count == 1
+        assert http.requests[0].url.host == "api.search.brave.com"
+        assert result.source_used == "Brave Search (fallback)"
+        
+        # Once the open window has passed, Google is tried again
+        search.circuits["google"]["open_until"] = 0.0
+        assert search._circuit_allows("google")
+        
+    @patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test_google_key', 'GOOGLE_CUSTOM_SEARCH_CX': 'test_google_cx', 'BRAVE_SEARCH_API_KEY': 'test_brave_key'})
+    @pytest.mark.asyncio
+    async def test_quota_error_opens_circuit_immediately(self):
+        """Test that a quota response skips the provider without waiting for repeated failures"""
+        http = MockHTTP(httpx.Response(403, text="Quota exceeded"), httpx.Response(200, json={'web': {'results': []}}))
+        
+        search = ReliableWebSearch()
+        with http.patch():
+            await search.web_search("test query")
+        
+        assert search.circuits["google"]["fails"] == 1
+        assert not search._circuit_allows("google")
+        assert search._circuit_allows("brave")
+
+    @patch.dict(os.environ, {'GOOGLE_CUSTOM_SEARCH_KEY': 'test_google_key', 'GOOGLE_CUSTOM_SEARCH_CX': 'test_google_cx', 'BRAVE_SEARCH_API_KEY': 'test_brave_key'})
+    @pytest.mark.asyncio
+    async def test_bulk_research_keeps_query_order(self):
+        """Test that bulk research returns one response per query, with failures reported in place"""
+        search = ReliableWebSearch()
+        
+        async def fake_search(query, count=None, market=None, freshness=None):
+            if query == "broken":
+                raise RuntimeError("boom")
+            return WebSearchResponse(query=query, results=[], total_results=0, search_time=0.1, success=True)
+        
+        with patch.object(search, 'web_search', side_effect=fake_search):
+            responses = await search.bulk_research(["first", "broken", "last"])
+        
+        assert [r.query for r in responses] == ["first", "broken", "last"]
+        assert [r.success for r in responses] == [True, False, True]
+        assert "boom" in responses[1].error_message
 
 
 # Performance and integration tests
@@ -342,12 +403,9 @@ class TestWebSearchIntegration:
     @pytest.mark.asyncio
     async def test_response_time_tracking(self):
         """Test that search time is properly tracked"""
-        with patch('requests.get') as mock_get:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {'items': []}
-            mock_get.return_value = mock_response
-            
+        http = MockHTTP(httpx.Response(200, json={'items': []}))
+        
+        with http.patch():
             search = ReliableWebSearch()
             result = await search.web_search("test query")
             
@@ -359,12 +417,9 @@ class TestWebSearchIntegration:
     @pytest.mark.asyncio
     async def test_concurrent_requests(self):
         """Test handling of concurrent search requests"""
-        with patch('requests.get') as mock_get:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {'items': []}
-            mock_get.return_value = mock_response
-            
+        http = MockHTTP(httpx.Response(200, json={'items': []}))
+        
+        with http.patch():
             search = ReliableWebSearch()
             
             # Make concurrent requests
@@ -380,10 +435,9 @@ class TestWebSearchIntegration:
                 assert result.success == True
             
             # Should have made 3 Google API calls
-            assert mock_get.call_count == 3
+            assert http.call_count == 3
             assert search.google_requests_today == 3
 
-
 if __name__ == "__main__":
     # Run basic functionality test
     import sys
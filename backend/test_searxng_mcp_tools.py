@@ -0,0 +1,145 @@
+"""
+Tests for SearXNG MCP Tools
+Covers the shared HTTP client path and the worker-level search cache
+"""
+
+import pytest
+from unittest.mock import patch
+import httpx
+import searxng_mcp_tools as smt
+from searxng_mcp_tools import SearXNGMCPTools
+
+
+def _mock_client(*responses):
+    """httpx client replaying canned responses; returns (client, recorded requests)"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return responses[min(len(requests), len(responses)) - 1]
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), requests
+
+SEARCH_JSON = {"results": [{"title": "Grant A", "content": "Funding for A", "url": "https://a.example", "engine": "google"}]}
+
+
+class TestSearchCache:
+    """Repeated searches are served from the worker cache"""
+
+    def setup_method(self):
+        smt.clear_search_cache()
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_served_from_cache(self):
+        client, requests = _mock_client(httpx.Response(200, json=SEARCH_JSON))
+        tools = SearXNGMCPTools()
+
+        with patch.object(smt, '_HTTP', client):
+            first = await tools.web_search("Education Grants ")
+            second = await tools.web_search("education grants")
+
+        assert first.success and first.total_results == 1
+        assert second.success and second.query == "education grants"
+        assert [r.url for r in second.results] == [r.url for r in first.results]
+        assert second.results is not first.results
+        assert len(requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_search_not_cached(self):
+        client, requests = _mock_client(httpx.Response(503), httpx.Response(503), httpx.Response(503),
+                                        httpx.Response(200, json=SEARCH_JSON))
+        tools = SearXNGMCPTools()
+
+        with patch.object(smt, '_HTTP', client):
+            failed = await tools.web_search("education grants")
+            recovered = await tools.web_search("education grants")
+
+        assert not failed.success
+        assert recovered.success
+        assert len(requests) == tools.max_retries + 1
+
+
+class TestFullOrgResearch:
+    """full_org_research fans out the three research calls"""
+
+    @pytest.mark.asyncio
+    async def test_runs_all_research_and_reports_failures(self):
+        tools = SearXNGMCPTools()
+
+        async def failing_funder_research(funder_name):
+            raise RuntimeError("instance down")
+
+        with patch.object(tools, 'grant_research', return_value="grants"), \
+             patch.object(tools, 'funder_research', side_effect=failing_funder_research), \
+             patch.object(tools, 'competitive_analysis', return_value="competitors") as competitive:
+            research = await tools.full_org_research("AI education", "Gates Foundation", "education", "K-12")
+
+        assert research["grant_research"] == "grants"
+        assert research["competitive_analysis"] == "competitors"
+        assert research["funder_research"].startswith("ERROR: funder_research raised RuntimeError")
+        competitive.assert_awaited_once_with("education", "K-12")
+
+
+class TestMultiSearch:
+    """multi_search runs queries together and returns each source once"""
+
+    def setup_method(self):
+        smt.clear_search_cache()
+
+    @pytest.mark.asyncio
+    async def test_drops_urls_seen_in_earlier_queries(self):
+        def handler(request):
+            query = request.url.params["q"]
+            results = [{"title": query, "content": "", "url": f"https://{query}.example"},
+                       {"title": "Shared", "content": "", "url": "https://shared.example"}]
+            return httpx.Response(200, json={"results": results})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        tools = SearXNGMCPTools()
+
+        with patch.object(smt, '_HTTP', client):
+            responses = await tools.multi_search(["first", "second"])
+            cached = await tools.web_search("second")
+
+        assert list(responses) == ["first", "second"]
+        assert [r.url for r in responses["first"].results] == ["https://first.example", "https://shared.example"]
+        assert [r.url for r in responses["second"].results] == ["https://second.example"]
+        assert responses["second"].total_results == 1
+        assert cached.total_results == 2
+
+
+class TestInstanceCircuitBreaker:
+    """Repeatedly failing instances are skipped"""
+
+    def setup_method(self):
+        smt.clear_search_cache()
+
+    @pytest.mark.asyncio
+    async def test_failing_instance_is_skipped(self):
+        client, requests = _mock_client(httpx.Response(200, json=SEARCH_JSON))
+        tools = SearXNGMCPTools()
+        down = tools.searxng_instances[0]
+        for _ in range(smt.INSTANCE_FAILURE_THRESHOLD):
+            tools._record_instance_failure(down)
+
+        assert down not in tools._available_instances()
+        with patch.object(smt, '_HTTP', client), patch.object(smt.random, 'choice', side_effect=lambda options: options[0]):
+            response = await tools.web_search("education grants")
+
+        assert response.success
+        assert response.instance_used != down
+        assert requests[0].url.host != httpx.URL(down).host
+
+    @pytest.mark.asyncio
+    async def test_all_instances_open_fails_fast(self):
+        client, requests = _mock_client(httpx.Response(200, json=SEARCH_JSON))
+        tools = SearXNGMCPTools()
+        for instance in tools.searxng_instances:
+            for _ in range(smt.INSTANCE_FAILURE_THRESHOLD):
+                tools._record_instance_failure(instance)
+
+        with patch.object(smt, '_HTTP', client):
+            response = await tools.web_search("education grants")
+
+        assert not response.success
+        assert requests == []
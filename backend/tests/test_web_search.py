@@ -8,6 +8,7 @@ import os
 # Add the parent directory to the path to import the module
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+import MultiAgentFramework
 from MultiAgentFramework import MultiAgentOrchestrator
 
 
@@ -327,6 +328,58 @@ class TestMultiTierWebSearch:
         assert "🔍 GOOGLE SEARCH RESULTS" in result
 
 
+class TestSearchResultCache:
+    """Test the shared web search result cache"""
+    
+    SUCCESS = "🔍 RELIABLE WEB SEARCH RESULTS for 'grants' (Source: Google Custom Search):\n  1. Grant"
+    
+    @pytest.fixture
+    def orchestrator(self):
+        MultiAgentFramework._SEARCH_CACHE.clear()
+        yield MultiAgentOrchestrator()
+        MultiAgentFramework._SEARCH_CACHE.clear()
+    
+    @pytest.mark.asyncio
+    async def test_repeated_query_served_from_cache(self, orchestrator):
+        """Test that a normalized repeat query skips the upstream search"""
+        with patch.object(orchestrator, '_try_reliable_web_search', new=AsyncMock(return_value=self.SUCCESS)) as search:
+            first = await orchestrator._perform_web_search("Grants ")
+            second = await orchestrator._perform_web_search("grants")
+        
+        assert first == second == self.SUCCESS
+        assert search.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_queries_coalesced(self, orchestrator):
+        """Test that identical queries in flight at the same time share one upstream search"""
+        with patch.object(orchestrator, '_try_reliable_web_search', new=AsyncMock(return_value=self.SUCCESS)) as search:
+            results = await asyncio.gather(
+                orchestrator._perform_web_search("grants"),
+                orchestrator._perform_web_search("Grants"),
+                orchestrator._perform_web_search("other grants")
+            )
+        
+        assert results == [self.SUCCESS] * 3
+        assert search.await_count == 2
+        assert not MultiAgentFramework._SEARCH_INFLIGHT
+    
+    @pytest.mark.asyncio
+    async def test_failed_search_not_cached(self, orchestrator):
+        """Test that failures are never cached and expired results are not served"""
+        failure = "DEBUG: Reliable web search failed for query='grants'"
+        
+        with patch.object(orchestrator, '_try_reliable_web_search', new=AsyncMock(return_value=failure)):
+            assert await orchestrator._perform_web_search("grants") == failure
+        assert "grants" not in MultiAgentFramework._SEARCH_CACHE
+        
+        with patch.object(orchestrator, '_try_reliable_web_search', new=AsyncMock(return_value=self.SUCCESS)):
+            await orchestrator._perform_web_search("grants")
+        MultiAgentFramework._SEARCH_CACHE.clear()
+        
+        with patch.object(orchestrator, '_try_reliable_web_search', new=AsyncMock(return_value=failure)):
+            assert await orchestrator._perform_web_search("grants") == failure
+
+
 if __name__ == "__main__":
     # Run tests with: python -m pytest test_web_search.py -v
     pytest.main([__file__, "-v"])
\ No newline at end of file